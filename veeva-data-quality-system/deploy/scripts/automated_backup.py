@@ -12,6 +12,7 @@ import gzip
 import json
 import hashlib
 import logging
+from contextlib import closing
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -139,9 +140,7 @@ class AutomatedBackupSystem:
             # Use SQLite backup API for consistent backup
             backup_db_path = db_backup_dir / 'veeva_opendata.db'
             
-            with sqlite3.connect(db_path) as source_conn:
-                with sqlite3.connect(str(backup_db_path)) as backup_conn:
-                    source_conn.backup(backup_conn)
+            self._copy_sqlite_database(db_path, backup_db_path)
             
             # Verify backup database integrity
             with sqlite3.connect(str(backup_db_path)) as conn:
@@ -181,7 +180,7 @@ class AutomatedBackupSystem:
             db_backup_dir.mkdir(exist_ok=True)
             
             backup_metrics_path = db_backup_dir / 'metrics.db'
-            shutil.copy2(metrics_db_path, backup_metrics_path)
+            self._copy_sqlite_database(metrics_db_path, backup_metrics_path)
             
             # Verify integrity
             with sqlite3.connect(str(backup_metrics_path)) as conn:
@@ -204,6 +203,34 @@ class AutomatedBackupSystem:
             self.logger.error(f"Metrics database backup failed: {e}")
             return False
     
+    def _copy_sqlite_database(self, source_path: str, backup_db_path: Path) -> None:
+        """Copy a live SQLite database into a standalone backup file
+        
+        Monitoring and system maintenance keep databases in WAL mode, where
+        committed transactions can sit in the -wal file for a long time, so
+        a plain file copy misses them. The SQLite backup API reads through
+        the WAL; the copy is then switched to a rollback journal so it is a
+        single self-contained file.
+        """
+        with closing(sqlite3.connect(source_path)) as source_conn, \
+                closing(sqlite3.connect(str(backup_db_path))) as backup_conn:
+            source_conn.backup(backup_conn)
+            backup_conn.execute('PRAGMA journal_mode=DELETE')
+    
+    def _restore_sqlite_database(self, backup_db_path: Path, db_path: str) -> None:
+        """Put a backed-up SQLite database in place of db_path
+        
+        A -wal or -shm file left next to db_path belongs to the database
+        being replaced; SQLite would replay its frames onto the restored
+        file, so they are removed first.
+        """
+        for suffix in ('-wal', '-shm'):
+            sidecar = Path(f"{db_path}{suffix}")
+            if sidecar.exists():
+                sidecar.unlink()
+        
+        shutil.copy2(str(backup_db_path), db_path)
+    
     def _backup_configurations(self, backup_path: Path, backup_info: Dict) -> bool:
         """Backup configuration files"""
         try:
@@ -411,13 +438,15 @@ class AutomatedBackupSystem:
             # Restore database
             db_backup_path = backup_path / 'database' / 'veeva_opendata.db'
             if db_backup_path.exists():
-                shutil.copy2(str(db_backup_path), self.config['database_path'])
+                self._restore_sqlite_database(db_backup_path, self.config['database_path'])
                 self.logger.info("Database restored successfully")
             
             # Restore metrics database
             metrics_backup_path = backup_path / 'database' / 'metrics.db'
             if metrics_backup_path.exists():
-                shutil.copy2(str(metrics_backup_path), self.config.get('metrics_db_path', '/app/data/metrics.db'))
+                self._restore_sqlite_database(
+                    metrics_backup_path, self.config.get('metrics_db_path', '/app/data/metrics.db')
+                )
                 self.logger.info("Metrics database restored successfully")
             
             return True, f"Backup {backup_name} restored successfully"
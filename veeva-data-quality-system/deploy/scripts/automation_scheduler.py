@@ -7,21 +7,85 @@ Coordinates all automation tasks and ensures system self-maintenance
 import os
 import sys
 import json
+import asyncio
+import atexit
+import functools
 import logging
+import logging.handlers
+import queue
+import operator
 import schedule
 import time
 import threading
 import subprocess
+from collections import deque
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Callable, Optional
+from typing import Any, Dict, List, Callable, Optional
 from dataclasses import dataclass, asdict
 import signal
-import psutil
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+_MEMINFO_CACHE_SECONDS = 5
+_RECENT_OUTCOME_WINDOW = 20
+
+# How often wait_for_stop() checks for a shutdown signal
+_SIGNAL_POLL_SECONDS = 0.5
+
+# Status output icons
+_HEALTH_ICONS = {
+    'healthy': '✅',
+    'degraded': '⚠️',
+    'critical': '🔴',
+    'error': '❌'
+}
+_UNKNOWN_HEALTH_ICON = '❓'
+_TASK_ICON_RUNNING = '🔄'
+_TASK_ICON_OK = '✅'
+_TASK_ICON_WARN = '⚠️'
+_TASK_ICON_FAILED = '❌'
+
+# Fields of a task history entry reported as recent activity
+_ACTIVITY_FIELDS = ('task_name', 'start_time', 'duration_seconds', 'success', 'error')
+_get_activity_values = operator.attrgetter(
+    'task_name', 'start_time_iso', 'duration_seconds', 'success', 'error'
+)
+
+# Daily summary body; recommendations are only appended on unhealthy days
+_DAILY_SUMMARY_TEMPLATE = (
+    "Daily Operations Summary for {date}:\n"
+    "\n"
+    "Tasks Executed: {total_tasks}\n"
+    "Successful: {successful_tasks}\n"
+    "Failed: {failed_tasks}\n"
+    "Total Runtime: {total_runtime_minutes:.1f} minutes\n"
+    "\n"
+    "System Health: {health}"
+)
+
+@functools.lru_cache(maxsize=1)
+def _read_memory_percent(time_bucket: int) -> float:
+    """Read memory usage from /proc/meminfo (cached per time bucket)"""
+    meminfo = {}
+    with open('/proc/meminfo', 'r') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            meminfo[key] = int(value.split()[0])
+    
+    total = meminfo['MemTotal']
+    return (total - meminfo['MemAvailable']) / total * 100
+
+def _get_memory_percent() -> float:
+    """Get system memory usage percentage, refreshed at most every few seconds"""
+    return _read_memory_percent(int(time.monotonic() // _MEMINFO_CACHE_SECONDS))
+
+def _get_cpu_load_percent() -> float:
+    """Get the 1-minute load average as a percentage of available CPUs"""
+    return os.getloadavg()[0] / (os.cpu_count() or 1) * 100
+
 @dataclass
 class ScheduledTask:
     """Scheduled task configuration"""
@@ -31,6 +95,7 @@ class ScheduledTask:
     schedule_value: str  # '5m', '1h', '2d', 'monday', etc.
     enabled: bool = True
     last_run: Optional[datetime] = None
+    last_run_iso: Optional[str] = None  # Cached last_run.isoformat() for status output
     next_run: Optional[datetime] = None
     run_count: int = 0
     failure_count: int = 0
@@ -39,29 +104,88 @@ class ScheduledTask:
     critical: bool = False
     dependencies: List[str] = None
 
+@dataclass(slots=True)
+class TaskStatusView:
+    """Point-in-time status snapshot of a scheduled task"""
+    enabled: bool
+    schedule_type: str
+    schedule_value: str
+    last_run: Optional[str]
+    run_count: int
+    failure_count: int
+    critical: bool
+    currently_running: bool
+    
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+@dataclass(slots=True)
+class TaskResult:
+    """Outcome of a single task execution, as kept in the task history"""
+    task_name: str
+    start_time: datetime
+    start_time_iso: str
+    end_time: Optional[datetime] = None
+    duration_seconds: float = 0
+    success: bool = False
+    error: Optional[str] = None
+    result: Any = None
+
 class AutomationScheduler:
     """Comprehensive automation scheduler and orchestrator"""
     
-    def __init__(self, config_path: str = None):
+    def __init__(self, config_path: str = None, status_only: bool = False):
+        """Build the scheduler and its task table
+        
+        With status_only, only what get_status() reads is set up: the
+        configuration and the task table. Logging is left unconfigured, the
+        automation modules are not created and no jobs are scheduled, so
+        such an instance can report status but not run tasks.
+        """
         self.config = self._load_config(config_path)
+        self._status_only = status_only
         self.tasks = {}
-        self.running = False
+        self._task_names = ()  # Registration order, rebuilt whenever a task is added
+        # Set while the scheduler is running; start() flips it under the lock
+        # so concurrent callers cannot both launch a scheduler thread
+        self._run_state = threading.Event()
+        self._run_state_lock = threading.Lock()
         self.scheduler_thread = None
-        self.task_history = []
+        # History is appended in completion order and bounded in size; the
+        # outcome window tracks the last few results for health assessment
+        self.task_history = deque(maxlen=self.config['scheduler']['max_task_history'])
+        self._recent_outcomes = deque(maxlen=_RECENT_OUTCOME_WINDOW)
+        self._recent_failures = 0
+        self._history_lock = threading.Lock()
         
-        # Setup logging
-        self._setup_logging()
+        # Threads of currently executing tasks, keyed by task name
+        self._running_tasks: Dict[str, threading.Thread] = {}
+        self._running_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._shutdown_signal = None
+        self._shutdown_deadline = None
+        self._previous_signal_handlers = {}
         
-        # Initialize components
-        self._init_automation_modules()
+        # Outgoing alerts are batched by an asyncio sender running on its own
+        # thread, so the scheduler never blocks on notification I/O
+        self._alert_sender_lock = threading.Lock()
+        self._alert_sender_thread = None
+        self._alert_loop = None
+        self._alert_queue = None
+        self._alert_leftover = None
+        
+        if status_only:
+            self.logger = logging.getLogger('AutomationScheduler')
+        else:
+            # Setup logging
+            self._setup_logging()
+            
+            # Initialize components
+            self._init_automation_modules()
         
         # Setup scheduled tasks
         self._setup_scheduled_tasks()
         
-        # Setup signal handlers
-        signal.signal(signal.SIGTERM, self._signal_handler)
-        signal.signal(signal.SIGINT, self._signal_handler)
-        
     def _load_config(self, config_path: str = None) -> Dict:
         """Load scheduler configuration"""
         default_config = {
@@ -70,7 +194,9 @@ class AutomationScheduler:
                 'max_concurrent_tasks': 3,
                 'task_timeout_seconds': 3600,
                 'log_retention_days': 30,
-                'enable_health_monitoring': True
+                'max_task_history': 1000,
+                'enable_health_monitoring': True,
+                'graceful_shutdown_timeout_seconds': 300
             },
             'tasks': {
                 'backup': {
@@ -129,7 +255,9 @@ class AutomationScheduler:
                 'task_failure_threshold': 2,
                 'critical_failure_immediate_notify': True,
                 'daily_summary_enabled': True,
-                'daily_summary_time': '08:00'
+                'daily_summary_time': '08:00',
+                'alert_batch_interval_seconds': 30,
+                'alert_batch_max_size': 200
             },
             'recovery': {
                 'auto_restart_failed_tasks': True,
@@ -150,11 +278,19 @@ class AutomationScheduler:
     
     def _deep_update(self, base_dict: Dict, update_dict: Dict) -> None:
         """Deep update dictionary"""
+        if not update_dict:
+            return
+        
         for key, value in update_dict.items():
-            if key in base_dict and isinstance(base_dict[key], dict) and isinstance(value, dict):
-                self._deep_update(base_dict[key], value)
-            else:
-                base_dict[key] = value
+            if key in base_dict:
+                current = base_dict[key]
+                if current is value:
+                    continue
+                if isinstance(current, dict) and isinstance(value, dict):
+                    if value:
+                        self._deep_update(current, value)
+                    continue
+            base_dict[key] = value
     
     def _setup_logging(self):
         """Setup logging configuration"""
@@ -164,16 +300,32 @@ class AutomationScheduler:
         log_dir = Path('/app/logs/automation')
         log_dir.mkdir(parents=True, exist_ok=True)
         
+        # Records are formatted by the QueueHandler and written to file and
+        # console by a single background listener thread, so task threads
+        # never block on log I/O. The file is reopened when disk cleanup
+        # rotates it, instead of writing on into the rotated-away copy
+        self._log_queue = queue.Queue(-1)
+        self._log_listener = logging.handlers.QueueListener(
+            self._log_queue,
+            logging.handlers.WatchedFileHandler(log_dir / 'scheduler.log'),
+            logging.StreamHandler()
+        )
+        self._log_listener.start()
+        atexit.register(self._stop_log_listener)
+        
         # Configure logging
         logging.basicConfig(
             level=getattr(logging, log_level),
             format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_dir / 'scheduler.log'),
-                logging.StreamHandler()
-            ]
+            handlers=[logging.handlers.QueueHandler(self._log_queue)]
         )
         self.logger = logging.getLogger('AutomationScheduler')
+    
+    def _stop_log_listener(self) -> None:
+        """Flush queued log records and stop the background log writer"""
+        listener, self._log_listener = self._log_listener, None
+        if listener is not None:
+            listener.stop()
         
     def _init_automation_modules(self):
         """Initialize automation modules"""
@@ -291,8 +443,12 @@ class AutomationScheduler:
     
     def add_task(self, task: ScheduledTask) -> None:
         """Add a scheduled task"""
+        # Intern the name so every task history entry shares one string
+        task.name = sys.intern(task.name)
         self.tasks[task.name] = task
-        self._schedule_task(task)
+        self._task_names = tuple(self.tasks)
+        if not self._status_only:
+            self._schedule_task(task)
         self.logger.info(f"Added scheduled task: {task.name}")
     
     def _schedule_task(self, task: ScheduledTask) -> None:
@@ -302,78 +458,87 @@ class AutomationScheduler:
             interval_value = task.schedule_value
             if interval_value.endswith('s'):
                 seconds = int(interval_value[:-1])
-                schedule.every(seconds).seconds.do(self._execute_task_wrapper, task.name)
+                schedule.every(seconds).seconds.do(self._execute_task_wrapper, task)
             elif interval_value.endswith('m'):
                 minutes = int(interval_value[:-1])
-                schedule.every(minutes).minutes.do(self._execute_task_wrapper, task.name)
+                schedule.every(minutes).minutes.do(self._execute_task_wrapper, task)
             elif interval_value.endswith('h'):
                 hours = int(interval_value[:-1])
-                schedule.every(hours).hours.do(self._execute_task_wrapper, task.name)
+                schedule.every(hours).hours.do(self._execute_task_wrapper, task)
             elif interval_value.endswith('d'):
                 days = int(interval_value[:-1])
-                schedule.every(days).days.do(self._execute_task_wrapper, task.name)
+                schedule.every(days).days.do(self._execute_task_wrapper, task)
         
         elif task.schedule_type == 'daily':
-            schedule.every().day.at(task.schedule_value).do(self._execute_task_wrapper, task.name)
+            schedule.every().day.at(task.schedule_value).do(self._execute_task_wrapper, task)
         
         elif task.schedule_type == 'weekly':
             # Parse weekly schedule (e.g., 'monday_10:00', 'sunday_03:00')
             if '_' in task.schedule_value:
                 day, time = task.schedule_value.split('_')
-                getattr(schedule.every(), day.lower()).at(time).do(self._execute_task_wrapper, task.name)
+                getattr(schedule.every(), day.lower()).at(time).do(self._execute_task_wrapper, task)
         
         elif task.schedule_type == 'monthly':
             # For monthly tasks, we'll check on the first day of each month
-            schedule.every().month.do(self._execute_task_wrapper, task.name)
+            schedule.every().month.do(self._execute_task_wrapper, task)
     
-    def _execute_task_wrapper(self, task_name: str) -> None:
-        """Wrapper for task execution with error handling"""
-        if not self.running:
-            return
+    def _execute_task_wrapper(self, task: ScheduledTask) -> None:
+        """Wrapper for task execution with error handling
         
-        task = self.tasks.get(task_name)
-        if not task or not task.enabled:
+        The task object is bound into the schedule job directly, so no
+        lookup by name is needed on each trigger.
+        """
+        if not self.running or not task.enabled:
             return
         
-        # Check if task is already running
-        if self._is_task_running(task_name):
-            self.logger.warning(f"Task {task_name} is already running, skipping")
-            return
+        # Execute task in a separate thread, registered atomically with the
+        # already-running check
+        with self._running_lock:
+            if task.name in self._running_tasks:
+                self.logger.warning(f"Task {task.name} is already running, skipping")
+                return
+            
+            task_thread = threading.Thread(
+                target=self._execute_task,
+                args=(task,),
+                name=f"Task-{task.name}"
+            )
+            task_thread.daemon = True
+            self._running_tasks[task.name] = task_thread
         
-        # Execute task in a separate thread
-        task_thread = threading.Thread(
-            target=self._execute_task,
-            args=(task,),
-            name=f"Task-{task_name}"
-        )
-        task_thread.daemon = True
         task_thread.start()
     
     def _is_task_running(self, task_name: str) -> bool:
         """Check if a task is currently running"""
-        for thread in threading.enumerate():
-            if thread.name == f"Task-{task_name}" and thread.is_alive():
-                return True
-        return False
+        with self._running_lock:
+            return task_name in self._running_tasks
+    
+    def _running_tasks_snapshot(self) -> Dict[str, threading.Thread]:
+        """Get a copy of the running task table under a single lock acquisition"""
+        with self._running_lock:
+            return dict(self._running_tasks)
     
     def _execute_task(self, task: ScheduledTask) -> None:
         """Execute a scheduled task"""
+        # Wall clock for reporting, monotonic clock for the duration
         start_time = datetime.now()
-        task_result = {
-            'task_name': task.name,
-            'start_time': start_time,
-            'end_time': None,
-            'duration_seconds': 0,
-            'success': False,
-            'error': None,
-            'result': None
-        }
+        start_monotonic = time.monotonic()
+        task_result = TaskResult(
+            task_name=task.name,
+            start_time=start_time,
+            start_time_iso=start_time.isoformat()
+        )
+        
+        current_thread = threading.current_thread()
+        with self._running_lock:
+            self._running_tasks[task.name] = current_thread
         
         try:
             self.logger.info(f"Starting task: {task.name}")
             
             # Update task status
             task.last_run = start_time
+            task.last_run_iso = task_result.start_time_iso
             task.run_count += 1
             
             # Execute the task function with timeout
@@ -383,15 +548,15 @@ class AutomationScheduler:
                 result = task.function()
             
             # Task completed successfully
-            task_result['success'] = True
-            task_result['result'] = result
+            task_result.success = True
+            task_result.result = result
             task.failure_count = 0  # Reset failure count on success
             
             self.logger.info(f"Task {task.name} completed successfully")
             
         except Exception as e:
             # Task failed
-            task_result['error'] = str(e)
+            task_result.error = str(e)
             task.failure_count += 1
             
             self.logger.error(f"Task {task.name} failed: {e}")
@@ -406,14 +571,20 @@ class AutomationScheduler:
         
         finally:
             # Update task result
-            task_result['end_time'] = datetime.now()
-            task_result['duration_seconds'] = (task_result['end_time'] - start_time).total_seconds()
+            task_result.duration_seconds = time.monotonic() - start_monotonic
+            task_result.end_time = datetime.now()
             
-            # Store task history
-            self.task_history.append(task_result)
+            with self._running_lock:
+                if self._running_tasks.get(task.name) is current_thread:
+                    del self._running_tasks[task.name]
             
-            # Cleanup old history
-            self._cleanup_task_history()
+            # Store task history
+            with self._history_lock:
+                self.task_history.append(task_result)
+                self._record_outcome(task_result.success)
+                
+                # Cleanup old history
+                self._cleanup_task_history()
     
     def _execute_with_timeout(self, func: Callable, timeout_seconds: int):
         """Execute function with timeout"""
@@ -511,30 +682,174 @@ class AutomationScheduler:
                 threshold=task.max_failures
             )
             
-            self.monitoring_system.send_alert_notification(critical_alert)
+            self._queue_alert(critical_alert, immediate=True)
             
         except Exception as e:
             self.logger.error(f"Failed to send critical failure notification: {e}")
     
+    def _record_outcome(self, success: bool) -> None:
+        """Update the rolling failure count for the recent outcome window"""
+        outcomes = self._recent_outcomes
+        if len(outcomes) == outcomes.maxlen and not outcomes[0]:
+            self._recent_failures -= 1
+        outcomes.append(success)
+        if not success:
+            self._recent_failures += 1
+    
+    def _queue_alert(self, alert, immediate: bool = False) -> None:
+        """Queue an alert for the batched sender, starting it on first use"""
+        with self._alert_sender_lock:
+            if self._alert_sender_thread is None:
+                self._start_alert_sender()
+            loop, alert_queue = self._alert_loop, self._alert_queue
+        
+        loop.call_soon_threadsafe(alert_queue.put_nowait, (alert, immediate))
+    
+    def _start_alert_sender(self) -> None:
+        """Start the event loop thread that drains the alert queue"""
+        self._alert_loop = asyncio.new_event_loop()
+        self._alert_queue = asyncio.Queue()
+        self._alert_leftover = []
+        self._alert_sender_thread = threading.Thread(
+            target=self._run_alert_loop,
+            args=(self._alert_loop, self._alert_queue, self._alert_leftover),
+            name='AlertSender',
+            daemon=True
+        )
+        self._alert_sender_thread.start()
+        atexit.register(self._stop_alert_sender)
+    
+    def _run_alert_loop(self, loop: asyncio.AbstractEventLoop, alert_queue: asyncio.Queue,
+                        leftover: List) -> None:
+        """Run the alert sender until it receives the stop sentinel"""
+        asyncio.set_event_loop(loop)
+        try:
+            leftover.extend(loop.run_until_complete(self._alert_sender(alert_queue)))
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            loop.close()
+    
+    async def _alert_sender(self, alert_queue: asyncio.Queue) -> List:
+        """Collect queued alerts into batches and send each batch off the loop
+        
+        A batch is sent once it reaches alert_batch_max_size, once
+        alert_batch_interval_seconds have passed since its first alert, or
+        immediately when an alert was queued with immediate=True. A None
+        item stops the sender after in-flight batches complete; the batch
+        it cut short is returned unsent, for _stop_alert_sender to send
+        on its own thread.
+        """
+        loop = asyncio.get_running_loop()
+        batch_interval = self.config['notifications']['alert_batch_interval_seconds']
+        max_size = self.config['notifications']['alert_batch_max_size']
+        in_flight = set()
+        batch = []
+        stopping = False
+        
+        while not stopping:
+            item = await alert_queue.get()
+            if item is None:
+                break
+            
+            alert, flush_now = item
+            batch = [alert]
+            deadline = loop.time() + batch_interval
+            
+            while not flush_now and len(batch) < max_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(alert_queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                alert, flush_now = item
+                batch.append(alert)
+            
+            if stopping:
+                break
+            
+            send_task = asyncio.create_task(self._send_alert_batch(batch))
+            in_flight.add(send_task)
+            send_task.add_done_callback(in_flight.discard)
+            batch = []
+        
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        
+        return batch
+    
+    async def _send_alert_batch(self, batch: List) -> None:
+        """Send one batch of alerts on a worker thread"""
+        try:
+            await asyncio.to_thread(self.monitoring_system.send_alerts_batch, batch)
+        except Exception as e:
+            self.logger.error(f"Failed to send {len(batch)} queued alerts: {e}")
+    
+    def _stop_alert_sender(self) -> None:
+        """Flush pending alerts and stop the sender thread
+        
+        The batch that was still collecting when the sender stopped is sent
+        here with send_alerts_batch(concurrent=False), one alert after
+        another on the calling thread. Neither the loop's default executor
+        nor the monitoring system's concurrent send is used, as both start
+        worker threads, which the interpreter no longer allows when this
+        runs from the atexit hook.
+        """
+        with self._alert_sender_lock:
+            sender, self._alert_sender_thread = self._alert_sender_thread, None
+            loop, alert_queue = self._alert_loop, self._alert_queue
+            leftover = self._alert_leftover
+            self._alert_loop = self._alert_queue = self._alert_leftover = None
+        
+        if sender is None:
+            return
+        
+        loop.call_soon_threadsafe(alert_queue.put_nowait, None)
+        sender.join(timeout=self.config['notifications']['alert_batch_interval_seconds'])
+        
+        if leftover:
+            try:
+                self.monitoring_system.send_alerts_batch(leftover, concurrent=False)
+            except Exception as e:
+                self.logger.error(f"Failed to send {len(leftover)} queued alerts: {e}")
+    
     def _cleanup_task_history(self) -> None:
         """Cleanup old task history"""
         retention_days = self.config['scheduler']['log_retention_days']
         cutoff_date = datetime.now() - timedelta(days=retention_days)
         
-        self.task_history = [
-            result for result in self.task_history
-            if result['start_time'] > cutoff_date
-        ]
+        # Entries are appended as tasks complete, so end_time is the key the
+        # deque is ordered by; start_time is not, as tasks overlap
+        while self.task_history and self.task_history[0].end_time <= cutoff_date:
+            self.task_history.popleft()
+    
+    @property
+    def running(self) -> bool:
+        """Whether the scheduler is currently running"""
+        return self._run_state.is_set()
     
     def start(self) -> None:
         """Start the automation scheduler"""
-        if self.running:
-            self.logger.warning("Scheduler is already running")
-            return
+        with self._run_state_lock:
+            if self._run_state.is_set():
+                self.logger.warning("Scheduler is already running")
+                return
+            self._run_state.set()
         
-        self.running = True
+        self._stop_event.clear()
+        self._shutdown_signal = None
+        self._shutdown_deadline = None
         self.logger.info("Starting automation scheduler")
         
+        # Signals only request a graceful stop while the scheduler runs;
+        # outside of that they keep their usual effect
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self._previous_signal_handlers[signum] = signal.signal(signum, self._signal_handler)
+        
         # Start scheduler thread
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
@@ -542,17 +857,65 @@ class AutomationScheduler:
         self.logger.info("Automation scheduler started successfully")
     
     def stop(self) -> None:
-        """Stop the automation scheduler"""
-        if not self.running:
+        """Stop the automation scheduler and wait for in-flight tasks"""
+        if self.scheduler_thread is None:
+            self._flush_notifications()
             return
         
+        if self._shutdown_signal is not None:
+            self.logger.info(f"Received signal {self._shutdown_signal}, shutting down gracefully")
+        
         self.logger.info("Stopping automation scheduler")
-        self.running = False
+        self._run_state.clear()
+        self._stop_event.set()
         
-        if self.scheduler_thread:
-            self.scheduler_thread.join(timeout=5)
+        self.scheduler_thread.join(timeout=5)
+        self.scheduler_thread = None
+        
+        for signum, handler in self._previous_signal_handlers.items():
+            signal.signal(signum, handler)
+        self._previous_signal_handlers.clear()
+        
+        self._wait_for_running_tasks()
+        self._flush_notifications()
         
         self.logger.info("Automation scheduler stopped")
+        self._stop_log_listener()
+    
+    def _flush_notifications(self) -> None:
+        """Send the alerts still queued by the monitoring system and by the scheduler"""
+        self.monitoring_system.close()
+        self._stop_alert_sender()
+    
+    def get_active_tasks(self) -> List[str]:
+        """Get the names of tasks that are currently executing"""
+        return list(self._running_tasks_snapshot())
+    
+    def _wait_for_running_tasks(self) -> None:
+        """Wait for in-flight tasks to finish, bounded by the shutdown deadline"""
+        deadline = self._shutdown_deadline
+        if deadline is None:
+            deadline = time.monotonic() + self.config['scheduler']['graceful_shutdown_timeout_seconds']
+        
+        running_tasks = self._running_tasks_snapshot()
+        if not running_tasks:
+            return
+        
+        self.logger.info(f"Waiting for running tasks to finish: {', '.join(running_tasks)}")
+        
+        current_thread = threading.current_thread()
+        for thread in running_tasks.values():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if thread is not current_thread and thread.is_alive():
+                thread.join(timeout=remaining)
+        
+        still_running = self._running_tasks_snapshot()
+        if still_running:
+            self.logger.warning(
+                f"Shutdown timeout reached with tasks still running: {', '.join(still_running)}"
+            )
     
     def _scheduler_loop(self) -> None:
         """Main scheduler loop"""
@@ -567,30 +930,27 @@ class AutomationScheduler:
                 if self.config['scheduler']['enable_health_monitoring']:
                     self._monitor_scheduler_health()
                 
-                time.sleep(check_interval)
+                self._stop_event.wait(check_interval)
                 
             except Exception as e:
                 self.logger.error(f"Scheduler loop error: {e}")
-                time.sleep(check_interval)
+                self._stop_event.wait(check_interval)
     
     def _monitor_scheduler_health(self) -> None:
         """Monitor scheduler health"""
         try:
             # Check system resources
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory_percent = psutil.virtual_memory().percent
+            cpu_percent = _get_cpu_load_percent()
+            memory_percent = _get_memory_percent()
             
             # Check if we have too many concurrent tasks
-            active_task_threads = [
-                thread for thread in threading.enumerate()
-                if thread.name.startswith('Task-') and thread.is_alive()
-            ]
+            running_tasks = self._running_tasks_snapshot()
             
-            if len(active_task_threads) > self.config['scheduler']['max_concurrent_tasks']:
-                self.logger.warning(f"Too many concurrent tasks: {len(active_task_threads)}")
+            if len(running_tasks) > self.config['scheduler']['max_concurrent_tasks']:
+                self.logger.warning(f"Too many concurrent tasks: {len(running_tasks)}")
             
             # Check for stuck tasks
-            for thread in active_task_threads:
+            for thread in running_tasks.values():
                 # This is a basic check - in production you'd want more sophisticated monitoring
                 pass
         
@@ -598,10 +958,35 @@ class AutomationScheduler:
             self.logger.error(f"Scheduler health monitoring failed: {e}")
     
     def _signal_handler(self, signum, frame):
-        """Handle shutdown signals"""
-        self.logger.info(f"Received signal {signum}, shutting down gracefully")
-        self.stop()
-        sys.exit(0)
+        """Handle shutdown signals
+        
+        Only records the signal: setting an Event takes its internal lock,
+        which the interrupted main thread may be holding. wait_for_stop()
+        notices the signal, and stop() then logs it and waits for running
+        tasks.
+        """
+        if self._shutdown_deadline is None:
+            self._shutdown_deadline = (
+                time.monotonic() + self.config['scheduler']['graceful_shutdown_timeout_seconds']
+            )
+        self._shutdown_signal = signum
+    
+    def wait_for_stop(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the scheduler is stopped or a shutdown signal arrives
+        
+        Returns False if timeout seconds passed first. Waits in short slices
+        so a signal recorded by _signal_handler is noticed promptly.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._shutdown_signal is None:
+            wait_seconds = _SIGNAL_POLL_SECONDS
+            if deadline is not None:
+                wait_seconds = min(wait_seconds, deadline - time.monotonic())
+                if wait_seconds <= 0:
+                    return False
+            if self._stop_event.wait(wait_seconds):
+                return True
+        return True
     
     # Task implementations
     def _run_backup_task(self) -> Dict:
@@ -645,7 +1030,7 @@ class AutomationScheduler:
     
     def _run_monitoring_task(self) -> Dict:
         """Run monitoring cycle task"""
-        monitoring_results = self.monitoring_system.run_monitoring_cycle()
+        monitoring_results = self.monitoring_system.run_monitoring_cycle(wait_for_notifications=True)
         return monitoring_results
     
     def _run_health_check_task(self) -> Dict:
@@ -686,19 +1071,23 @@ class AutomationScheduler:
         """Generate daily operations summary"""
         yesterday = datetime.now() - timedelta(days=1)
         
+        with self._history_lock:
+            history = list(self.task_history)
+        
         # Get task history for the last 24 hours
         recent_tasks = [
-            result for result in self.task_history
-            if result['start_time'] > yesterday
+            result for result in history
+            if result.start_time > yesterday
         ]
         
-        # Calculate summary statistics
+        # Calculate summary statistics; failures are whatever did not succeed
+        successful_tasks = sum(1 for t in recent_tasks if t.success)
         summary = {
             'date': yesterday.date().isoformat(),
             'total_tasks': len(recent_tasks),
-            'successful_tasks': len([t for t in recent_tasks if t['success']]),
-            'failed_tasks': len([t for t in recent_tasks if not t['success']]),
-            'total_runtime_minutes': sum(t['duration_seconds'] for t in recent_tasks) / 60,
+            'successful_tasks': successful_tasks,
+            'failed_tasks': len(recent_tasks) - successful_tasks,
+            'total_runtime_minutes': sum(t.duration_seconds for t in recent_tasks) / 60,
             'task_breakdown': {},
             'system_health': 'healthy',
             'recommendations': []
@@ -706,7 +1095,7 @@ class AutomationScheduler:
         
         # Task breakdown
         for task_result in recent_tasks:
-            task_name = task_result['task_name']
+            task_name = task_result.task_name
             if task_name not in summary['task_breakdown']:
                 summary['task_breakdown'][task_name] = {
                     'runs': 0,
@@ -717,13 +1106,13 @@ class AutomationScheduler:
             
             breakdown = summary['task_breakdown'][task_name]
             breakdown['runs'] += 1
-            if task_result['success']:
+            if task_result.success:
                 breakdown['successes'] += 1
             else:
                 breakdown['failures'] += 1
             breakdown['avg_duration_seconds'] = (
                 breakdown['avg_duration_seconds'] * (breakdown['runs'] - 1) + 
-                task_result['duration_seconds']
+                task_result.duration_seconds
             ) / breakdown['runs']
         
         # Health assessment
@@ -751,23 +1140,19 @@ class AutomationScheduler:
             elif health_status == 'critical':
                 severity = 'critical'
             
+            description = _DAILY_SUMMARY_TEMPLATE.format_map({
+                **summary, 'health': health_status.upper()
+            })
+            if summary['recommendations']:
+                description += "\n\nRecommendations:\n" + "\n".join(
+                    f"• {rec}" for rec in summary['recommendations']
+                )
+            
             summary_alert = Alert(
                 id=f"daily_summary_{summary['date']}",
                 severity=severity,
                 title=f'Daily Operations Summary - {summary["date"]}',
-                description=f"""
-                Daily Operations Summary for {summary['date']}:
-                
-                Tasks Executed: {summary['total_tasks']}
-                Successful: {summary['successful_tasks']}
-                Failed: {summary['failed_tasks']}
-                Total Runtime: {summary['total_runtime_minutes']:.1f} minutes
-                
-                System Health: {health_status.upper()}
-                
-                {'Recommendations:' if summary['recommendations'] else ''}
-                {chr(10).join(f'• {rec}' for rec in summary['recommendations'])}
-                """,
+                description=description,
                 timestamp=datetime.now(),
                 source='automation_scheduler',
                 metric_name='daily_summary',
@@ -775,13 +1160,17 @@ class AutomationScheduler:
                 threshold=summary['total_tasks']
             )
             
-            self.monitoring_system.send_alert_notification(summary_alert)
+            self._queue_alert(summary_alert)
             
         except Exception as e:
             self.logger.error(f"Failed to send daily summary: {e}")
     
     def get_status(self) -> Dict:
-        """Get scheduler status"""
+        """Get scheduler status (task entries are TaskStatusView snapshots)
+        
+        Callers that only need to know which tasks are executing use
+        get_active_tasks() instead.
+        """
         try:
             status = {
                 'running': self.running,
@@ -791,44 +1180,38 @@ class AutomationScheduler:
                 'system_health': 'healthy'
             }
             
-            # Task status
-            for task_name, task in self.tasks.items():
-                status['tasks'][task_name] = {
-                    'enabled': task.enabled,
-                    'schedule_type': task.schedule_type,
-                    'schedule_value': task.schedule_value,
-                    'last_run': task.last_run.isoformat() if task.last_run else None,
-                    'run_count': task.run_count,
-                    'failure_count': task.failure_count,
-                    'critical': task.critical,
-                    'currently_running': self._is_task_running(task_name)
-                }
+            # Task status, checked against one snapshot of the running tasks
+            with self._running_lock:
+                running_snapshot = set(self._running_tasks)
             
-            # Recent activity (last 10 task executions)
-            status['recent_activity'] = [
-                {
-                    'task_name': result['task_name'],
-                    'start_time': result['start_time'].isoformat(),
-                    'duration_seconds': result['duration_seconds'],
-                    'success': result['success'],
-                    'error': result.get('error')
-                }
-                for result in sorted(
-                    self.task_history, 
-                    key=lambda x: x['start_time'], 
-                    reverse=True
-                )[:10]
-            ]
+            tasks = self.tasks
+            for task_name in self._task_names:
+                task = tasks[task_name]
+                status['tasks'][task_name] = TaskStatusView(
+                    enabled=task.enabled,
+                    schedule_type=task.schedule_type,
+                    schedule_value=task.schedule_value,
+                    last_run=task.last_run_iso,
+                    run_count=task.run_count,
+                    failure_count=task.failure_count,
+                    critical=task.critical,
+                    currently_running=task_name in running_snapshot
+                )
             
-            # Health assessment
-            recent_failures = [
-                result for result in self.task_history[-20:]  # Last 20 tasks
-                if not result['success']
+            with self._history_lock:
+                recent_results = list(islice(reversed(self.task_history), 10))
+                recent_failures = self._recent_failures
+            
+            # Recent activity (last 10 completed task executions, newest first)
+            status['recent_activity'] = [
+                dict(zip(_ACTIVITY_FIELDS, _get_activity_values(result)))
+                for result in recent_results
             ]
             
-            if len(recent_failures) > 10:  # More than 50% failures in recent tasks
+            # Health assessment over the last 20 tasks
+            if recent_failures > 10:  # More than 50% failures in recent tasks
                 status['system_health'] = 'critical'
-            elif len(recent_failures) > 4:  # More than 20% failures
+            elif recent_failures > 4:  # More than 20% failures
                 status['system_health'] = 'degraded'
             
             return status
@@ -841,105 +1224,150 @@ class AutomationScheduler:
             }
 
 
+def cmd_start(args) -> None:
+    """Start the scheduler and block until it is stopped"""
+    scheduler = AutomationScheduler(config_path=args.config)
+    
+    if args.daemon:
+        # Run as daemon
+        scheduler.start()
+        try:
+            scheduler.wait_for_stop()
+        except KeyboardInterrupt:
+            pass
+        scheduler.stop()
+        sys.exit(0)
+    
+    # Run and monitor
+    scheduler.start()
+    print("🚀 Automation scheduler started")
+    print("   Press Ctrl+C to stop")
+    
+    try:
+        while not scheduler.wait_for_stop(10):
+            if not args.json:
+                # Show brief status
+                active_tasks = scheduler.get_active_tasks()
+                if active_tasks:
+                    print(f"   🔄 Running tasks: {', '.join(active_tasks)}")
+                
+    except KeyboardInterrupt:
+        pass
+    
+    print("\n🛑 Stopping automation scheduler...")
+    scheduler.stop()
+    print("✅ Scheduler stopped")
+    sys.exit(0)
+
+
+def cmd_stop(args) -> None:
+    """Stop the scheduler
+    
+    A scheduler only lives inside its own process, so there is nothing to
+    construct here; running instances are stopped with SIGTERM/SIGINT.
+    """
+    print("✅ Scheduler stopped")
+
+
+def cmd_status(args) -> None:
+    """Print scheduler status"""
+    scheduler = AutomationScheduler(config_path=args.config, status_only=True)
+    status = scheduler.get_status()
+    
+    if args.json:
+        if 'tasks' in status:
+            status['tasks'] = {name: view.to_dict() for name, view in status['tasks'].items()}
+        # Stream the encoder output instead of building the whole string first
+        json.dump(status, sys.stdout, indent=2, default=str)
+        sys.stdout.write('\n')
+        return
+    
+    health_icon = _HEALTH_ICONS.get(status['system_health'], _UNKNOWN_HEALTH_ICON)
+    
+    print(f"{health_icon} Scheduler Status: {'RUNNING' if status['running'] else 'STOPPED'}")
+    print(f"🏥 System Health: {status['system_health'].upper()}")
+    print(f"📋 Tasks: {len(status['tasks'])}")
+    
+    print("\n📊 Task Status:")
+    for task_name, task_info in status['tasks'].items():
+        if task_info.currently_running:
+            status_icon = _TASK_ICON_RUNNING
+        elif task_info.failure_count == 0:
+            status_icon = _TASK_ICON_OK
+        else:
+            status_icon = _TASK_ICON_WARN
+        print(f"   {status_icon} {task_name}: {task_info.run_count} runs, {task_info.failure_count} failures")
+    
+    if status['recent_activity']:
+        print(f"\n📈 Recent Activity:")
+        for activity in islice(status['recent_activity'], 5):
+            status_icon = _TASK_ICON_OK if activity['success'] else _TASK_ICON_FAILED
+            print(f"   {status_icon} {activity['task_name']}: {activity['duration_seconds']:.1f}s")
+
+
+def cmd_run_task(args) -> None:
+    """Run a single task immediately"""
+    if not args.task:
+        print("❌ --task parameter required for run-task action")
+        sys.exit(1)
+    
+    scheduler = AutomationScheduler(config_path=args.config)
+    
+    if args.task not in scheduler.tasks:
+        print(f"❌ Task '{args.task}' not found")
+        print(f"Available tasks: {', '.join(scheduler.tasks.keys())}")
+        sys.exit(1)
+    
+    task = scheduler.tasks[args.task]
+    print(f"🔄 Running task: {args.task}")
+    
+    start_time = time.time()
+    try:
+        scheduler._execute_task(task)
+    finally:
+        # Flush alerts the task queued before the process exits
+        scheduler.stop()
+    duration = time.time() - start_time
+    
+    print(f"✅ Task completed in {duration:.1f} seconds")
+
+
 def main():
     """Main entry point for automation scheduler"""
     import argparse
     
+    # Options shared by every action. They are accepted before the action
+    # name, as they always were, and after it; the copies after it default
+    # to SUPPRESS so they do not overwrite a value given before it
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--config', default=argparse.SUPPRESS, help='Configuration file path')
+    common.add_argument('--json', action='store_true', default=argparse.SUPPRESS, help='Output as JSON')
+    
     parser = argparse.ArgumentParser(description='Veeva Data Quality System Automation Scheduler')
-    parser.add_argument('action', 
-                       choices=['start', 'stop', 'status', 'run-task'],
-                       help='Action to perform')
     parser.add_argument('--config', help='Configuration file path')
-    parser.add_argument('--task', help='Task name to run (for run-task action)')
     parser.add_argument('--json', action='store_true', help='Output as JSON')
-    parser.add_argument('--daemon', action='store_true', help='Run as daemon')
+    # Action options, also still accepted before the action name
+    parser.add_argument('--task', help='Task name to run (for run-task action)')
+    parser.add_argument('--daemon', action='store_true', help='Run as daemon (for start action)')
+    subparsers = parser.add_subparsers(dest='action', required=True, help='Action to perform')
     
-    args = parser.parse_args()
+    start_parser = subparsers.add_parser('start', parents=[common], help='Start the scheduler')
+    start_parser.add_argument('--daemon', action='store_true', default=argparse.SUPPRESS, help='Run as daemon')
+    start_parser.set_defaults(handler=cmd_start)
     
-    scheduler = AutomationScheduler(config_path=args.config)
+    stop_parser = subparsers.add_parser('stop', parents=[common], help='Stop the scheduler')
+    stop_parser.set_defaults(handler=cmd_stop)
     
-    if args.action == 'start':
-        if args.daemon:
-            # Run as daemon
-            scheduler.start()
-            try:
-                while scheduler.running:
-                    time.sleep(10)
-            except KeyboardInterrupt:
-                scheduler.stop()
-        else:
-            # Run and monitor
-            scheduler.start()
-            print("🚀 Automation scheduler started")
-            print("   Press Ctrl+C to stop")
-            
-            try:
-                while scheduler.running:
-                    time.sleep(10)
-                    if not args.json:
-                        # Show brief status
-                        status = scheduler.get_status()
-                        active_tasks = [name for name, info in status['tasks'].items() 
-                                      if info['currently_running']]
-                        if active_tasks:
-                            print(f"   🔄 Running tasks: {', '.join(active_tasks)}")
-                        
-            except KeyboardInterrupt:
-                print("\n🛑 Stopping automation scheduler...")
-                scheduler.stop()
-                print("✅ Scheduler stopped")
-    
-    elif args.action == 'stop':
-        scheduler.stop()
-        print("✅ Scheduler stopped")
+    status_parser = subparsers.add_parser('status', parents=[common], help='Show scheduler status')
+    status_parser.set_defaults(handler=cmd_status)
     
-    elif args.action == 'status':
-        status = scheduler.get_status()
-        
-        if args.json:
-            print(json.dumps(status, indent=2, default=str))
-        else:
-            health_icon = {
-                'healthy': '✅',
-                'degraded': '⚠️',
-                'critical': '🔴',
-                'error': '❌'
-            }.get(status['system_health'], '❓')
-            
-            print(f"{health_icon} Scheduler Status: {'RUNNING' if status['running'] else 'STOPPED'}")
-            print(f"🏥 System Health: {status['system_health'].upper()}")
-            print(f"📋 Tasks: {len(status['tasks'])}")
-            
-            print("\n📊 Task Status:")
-            for task_name, task_info in status['tasks'].items():
-                status_icon = "🔄" if task_info['currently_running'] else ("✅" if task_info['failure_count'] == 0 else "⚠️")
-                print(f"   {status_icon} {task_name}: {task_info['run_count']} runs, {task_info['failure_count']} failures")
-            
-            if status['recent_activity']:
-                print(f"\n📈 Recent Activity:")
-                for activity in status['recent_activity'][:5]:
-                    status_icon = "✅" if activity['success'] else "❌"
-                    print(f"   {status_icon} {activity['task_name']}: {activity['duration_seconds']:.1f}s")
-    
-    elif args.action == 'run-task':
-        if not args.task:
-            print("❌ --task parameter required for run-task action")
-            sys.exit(1)
-        
-        if args.task not in scheduler.tasks:
-            print(f"❌ Task '{args.task}' not found")
-            print(f"Available tasks: {', '.join(scheduler.tasks.keys())}")
-            sys.exit(1)
-        
-        task = scheduler.tasks[args.task]
-        print(f"🔄 Running task: {args.task}")
-        
-        start_time = time.time()
-        scheduler._execute_task(task)
-        duration = time.time() - start_time
-        
-        print(f"✅ Task completed in {duration:.1f} seconds")
+    run_task_parser = subparsers.add_parser('run-task', parents=[common], help='Run a single task now')
+    run_task_parser.add_argument('--task', default=argparse.SUPPRESS, help='Task name to run')
+    run_task_parser.set_defaults(handler=cmd_run_task)
+    
+    args = parser.parse_args()
+    args.handler(args)
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -5,25 +5,172 @@ Comprehensive monitoring with automated incident response
 """
 
 import os
+import re
 import sys
 import json
+import queue
+import asyncio
+import atexit
 import logging
-import smtplib
-import requests
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from typing import Dict, Iterator, List, Tuple, Optional, Any
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.message import EmailMessage
 import sqlite3
 import psutil
-import docker
 import time
+import functools
 from dataclasses import dataclass, asdict
+from types import MappingProxyType
+import numpy as np
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+# Flattened metric path each threshold name is checked against
+_THRESHOLD_METRIC_PATHS = MappingProxyType({
+    'cpu_usage': 'system.cpu.usage_percent',
+    'memory_usage': 'system.memory.used_percent',
+    'disk_usage': 'system.disk.used_percent',
+    'response_time': 'application.response_times.avg',
+    'database_connections': 'database.connection_count',
+    'error_rate': 'application.error_rate'
+})
+
+# Unit recorded for each metric name
+_UNIT_MAP = MappingProxyType({
+    'cpu_usage': '%',
+    'memory_usage': '%', 
+    'disk_usage': '%',
+    'response_time': 'ms',
+    'database_connections': 'count',
+    'error_rate': '%',
+    'temperature': '°C',
+    'network_latency': 'ms'
+})
+
+@functools.lru_cache(maxsize=None)
+def _metadata_json(key: str, value: str) -> str:
+    """Serialized {key: value} metadata of stored metrics, built once per pair"""
+    return json.dumps({key: value})
+
+# Kernel socket tables read for the network connection counts, and the
+# connection state column of their rows (hex: 01 ESTABLISHED, 0A LISTEN)
+_PROC_NET_TCP_FILES = ('/proc/net/tcp', '/proc/net/tcp6')
+_PROC_NET_UDP_FILES = ('/proc/net/udp', '/proc/net/udp6')
+_PROC_NET_STATE_RE = re.compile(rb'^\s*\d+:\s+\S+\s+\S+\s+([0-9A-F]{2})\s', re.MULTILINE)
+
+# Statements run every cycle; sqlite3 keeps them prepared per connection,
+# keyed on their text
+# A collection whose timestamp is already stored has its samples appended
+# to that row, so one duplicate cannot fail the whole flush
+_INSERT_METRICS_BLOB_SQL = '''
+    INSERT INTO system_metrics_blob (timestamp, payload) VALUES (?, ?)
+    ON CONFLICT(timestamp) DO UPDATE SET
+        payload = (
+            SELECT json_group_array(json(value)) FROM (
+                SELECT value FROM json_each(system_metrics_blob.payload)
+                UNION ALL
+                SELECT value FROM json_each(excluded.payload)
+            )
+        )
+'''
+
+_UPSERT_ALERT_SQL = '''
+    INSERT INTO alerts 
+    (id, severity, title, description, timestamp, source, 
+     metric_name, metric_value, threshold, resolved, resolved_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id) DO UPDATE SET
+        title = excluded.title,
+        description = excluded.description,
+        timestamp = excluded.timestamp,
+        metric_value = excluded.metric_value,
+        threshold = excluded.threshold,
+        resolved = excluded.resolved,
+        resolved_at = excluded.resolved_at
+'''
+
+_RESOLVE_ALERT_SQL = 'UPDATE alerts SET resolved = 1, resolved_at = ? WHERE id = ? AND resolved = 0'
+
+# Threshold alerts still open, oldest first, so the latest incident of a
+# metric and severity wins when they are keyed
+_FIRING_ALERTS_SQL = '''
+    SELECT id, metric_name, severity
+    FROM alerts
+    WHERE resolved = 0 AND source = 'monitoring'
+    ORDER BY timestamp
+'''
+
+def _alert_key(metric_name: str, severity: str) -> str:
+    """Key of a threshold alert's incidents: one metric at one severity"""
+    return f"alert_{metric_name}_{severity}"
+
+
+# Most alerts kept in memory for get_system_status
+_RECENT_ALERTS_CAPACITY = 256
+
+_RECENT_ALERTS_SQL = '''
+    SELECT id, severity, title, description, timestamp, resolved
+    FROM alerts
+    WHERE timestamp > ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+# Largest batch of alerts the background notifier sends at once, and how
+# long it waits for more alerts after the first before sending
+_NOTIFICATION_BATCH_SIZE = 32
+_NOTIFICATION_BATCH_WAIT_SECONDS = 1.0
+
+# Longest wait for queued notifications to be sent, at the end of a one-shot
+# cycle and at shutdown; past it the remaining notifications are abandoned
+_NOTIFICATION_DRAIN_TIMEOUT_SECONDS = 30.0
+
+# Body of email alerts, filled in from the alert's fields
+_EMAIL_ALERT_TEMPLATE = (
+    "Alert Details:\n"
+    "=============\n"
+    "Severity: {severity}\n"
+    "Title: {title}\n"
+    "Description: {description}\n"
+    "Timestamp: {timestamp}\n"
+    "Source: {source}\n"
+    "\n"
+    "Metric Information:\n"
+    "- Metric: {metric_name}\n"
+    "- Current Value: {metric_value}\n"
+    "- Threshold: {threshold}\n"
+    "\n"
+    "Alert ID: {id}\n"
+    "\n"
+    "This is an automated alert from the Veeva Data Quality System monitoring.\n"
+)
+
+# (category, metric, limit, issue) checks of get_system_status' health issues
+_HEALTH_ISSUE_CHECKS = (
+    ('cpu', 'usage_percent', 90, 'High CPU usage'),
+    ('memory', 'used_percent', 90, 'High memory usage'),
+    ('disk', 'used_percent', 95, 'Critical disk usage')
+)
+
+# Application database checked by _collect_database_metrics
+_APP_DB_PATH = '/app/data/database/veeva_opendata.db'
+
+# How often the application database's integrity is checked and its
+# table sizes measured
+_INTEGRITY_CHECK_INTERVAL_SECONDS = 3600
+_TABLE_SIZES_INTERVAL_SECONDS = 86400
+
+# How often monitoring cycles prune data past the retention period, and the
+# most free pages returned to the filesystem after each prune
+_RETENTION_PRUNE_INTERVAL_SECONDS = 3600
+_INCREMENTAL_VACUUM_PAGES = 1000
+
 @dataclass
 class Alert:
     """Alert data structure"""
@@ -52,6 +199,80 @@ class MetricThreshold:
     unit: str
     enabled: bool = True
 
+class MetricHistory:
+    """In-memory ring of recent metric samples, stored column-wise
+    
+    Each sample is a timestamp (epoch microseconds), a value and the id of
+    its series, one (metric_name, unit, source, metadata) combination.
+    Samples are appended every collection and taken out in bulk when they
+    are flushed to the metrics database; once the ring is full the oldest
+    samples are overwritten, flushed or not.
+    """
+    
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self._timestamps = np.empty(capacity, dtype='<i8')
+        self._values = np.empty(capacity, dtype='<f8')
+        self._series_ids = np.empty(capacity, dtype='<u2')
+        self._series: List[Tuple[str, str, str, str]] = []
+        self._series_index: Dict[Tuple[str, str, str, str], int] = {}
+        self._written = 0
+        self._flushed = 0
+        self._lock = threading.Lock()
+    
+    def append(self, timestamp: datetime, samples: List[Tuple[Tuple[str, str, str, str], float]]) -> None:
+        """Append samples, each a (series, value) pair, taken at timestamp"""
+        if not samples:
+            return
+        
+        with self._lock:
+            series_ids = []
+            for series, _ in samples:
+                series_id = self._series_index.get(series)
+                if series_id is None:
+                    series_id = self._series_index[series] = len(self._series)
+                    self._series.append(series)
+                series_ids.append(series_id)
+            
+            positions = np.arange(self._written, self._written + len(samples)) % self.capacity
+            self._timestamps[positions] = round(timestamp.timestamp() * 1_000_000)
+            self._values[positions] = [value for _, value in samples]
+            self._series_ids[positions] = series_ids
+            self._written += len(samples)
+    
+    def unflushed_rows(self) -> Tuple[int, List[Tuple]]:
+        """Samples not yet flushed, as system_metrics rows, and the write count they run up to
+        
+        Pass the write count to mark_flushed once the rows are stored.
+        """
+        with self._lock:
+            written = self._written
+            start = max(self._flushed, written - self.capacity)
+            positions = np.arange(start, written) % self.capacity
+            timestamps = self._timestamps[positions].tolist()
+            values = self._values[positions].tolist()
+            series_ids = self._series_ids[positions].tolist()
+        
+        isoformats = {
+            timestamp: datetime.fromtimestamp(timestamp // 1_000_000).replace(microsecond=timestamp % 1_000_000).isoformat()
+            for timestamp in set(timestamps)
+        }
+        rows = []
+        for timestamp, value, series_id in zip(timestamps, values, series_ids):
+            metric_name, unit, source, metadata = self._series[series_id]
+            rows.append((isoformats[timestamp], metric_name, value, unit, source, metadata))
+        return written, rows
+    
+    def mark_flushed(self, written: int) -> None:
+        """Record that samples up to the given write count are stored"""
+        with self._lock:
+            self._flushed = max(self._flushed, written)
+    
+    @property
+    def unflushed_count(self) -> int:
+        with self._lock:
+            return min(self._written - self._flushed, self.capacity)
+
 class MonitoringAutomation:
     """Comprehensive monitoring and alerting system"""
     
@@ -59,18 +280,92 @@ class MonitoringAutomation:
         self.config = self._load_config(config_path)
         self.alerts_db_path = Path('/app/data/alerts.db')
         self.metrics_db_path = Path('/app/data/metrics.db')
+        # Docker client, connected on first use: the cleanup and test-alert
+        # actions never need it
         self.docker_client = None
+        self._docker_client_ready = False
+        self._docker_client_lock = threading.Lock()
+        
+        # One long-lived connection per database, each used under its own lock
+        self._connections: Dict[Tuple[str, bool], Tuple[sqlite3.Connection, threading.Lock]] = {}
+        self._connections_lock = threading.Lock()
+        atexit.register(self.close)
+        
+        # Last collected metrics and when they were collected (monotonic clock)
+        self._metrics_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+        
+        # Recent metric samples, flushed to the metrics database in batches
+        self._metric_history = MetricHistory()
+        self._last_metrics_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+        
+        # Previous (container id, container CPU, system CPU) sample per container
+        self._container_cpu_samples: Dict[str, Tuple[str, int, int]] = {}
+        self._ncpu = os.cpu_count() or 1
+        
+        # Last application database integrity result and table sizes, and
+        # when each was taken (monotonic clock)
+        self._integrity_status = None
+        self._last_integrity_check = None
+        self._table_sizes: Dict[str, int] = {}
+        self._last_table_sizes = None
+        self._last_retention_prune = None
+        
+        # Incident ids of the threshold alerts firing as of the last cycle,
+        # keyed by metric and severity; read from the alerts table on first use
+        self._firing_alerts: Optional[Dict[str, str]] = None
+        
+        # Most recently stored alerts by id, oldest first, as get_system_status
+        # reports them; loaded from the alerts table on first use and again
+        # whenever another connection has written to it (its data_version)
+        self._recent_alerts: Optional[OrderedDict] = None
+        self._recent_alerts_version = None
+        self._recent_alerts_lock = threading.Lock()
+        
+        # Notification channels in use: configured and not switched off
+        notifications = self.config['notifications']
+        self._email_enabled = bool(
+            self.config['monitoring']['enable_email_alerts'] and notifications['email']['from_address']
+        )
+        self._webhook_enabled = bool(
+            self.config['monitoring']['enable_webhook_alerts'] and notifications['webhook']['url']
+        )
+        
+        # Alerts waiting for the background notifier, started on first use,
+        # how many queued alerts it has yet to finish, and how many
+        # notifications it sent since last asked; None on the queue stops it.
+        # While close() drains it, batches are sent without worker threads
+        self._notification_queue: queue.Queue = queue.Queue()
+        self._notifier: Optional[threading.Thread] = None
+        self._notifier_lock = threading.Lock()
+        self._notifications_done = threading.Condition(self._notifier_lock)
+        self._notifications_pending = 0
+        self._notifications_sent = 0
+        self._notifier_draining = False
+        
+        # SMTP connection shared by email alerts, used under its lock, and
+        # HTTP session for webhook alerts, keeping connections alive between
+        # them; both are created on first use, so actions that send nothing
+        # never import smtplib or requests
+        self._smtp = None
+        self._smtp_lock = threading.Lock()
+        self._http = None
+        self._http_lock = threading.Lock()
         
         self._setup_logging()
-        self._init_docker_client()
         self._init_databases()
         self._load_thresholds()
         
+        # Prime psutil's CPU counters; each later non-blocking cpu_percent()
+        # call reports usage since the previous one
+        psutil.cpu_percent(interval=None)
+        
     def _load_config(self, config_path: str = None) -> Dict:
         """Load monitoring configuration"""
         default_config = {
             'monitoring': {
                 'interval_seconds': 60,
+                'metrics_flush_interval_seconds': 300,
                 'retention_days': 90,
                 'enable_email_alerts': True,
                 'enable_webhook_alerts': True,
@@ -91,7 +386,8 @@ class MonitoringAutomation:
                     'username': os.getenv('SMTP_USERNAME', ''),
                     'password': os.getenv('SMTP_PASSWORD', ''),
                     'from_address': os.getenv('ALERT_FROM_EMAIL', 'alerts@veeva-system.local'),
-                    'to_addresses': os.getenv('ALERT_TO_EMAILS', 'admin@veeva-system.local').split(',')
+                    'to_addresses': os.getenv('ALERT_TO_EMAILS', 'admin@veeva-system.local').split(','),
+                    'timeout': 10
                 },
                 'webhook': {
                     'url': os.getenv('WEBHOOK_URL', ''),
@@ -136,18 +432,131 @@ class MonitoringAutomation:
     def _init_docker_client(self):
         """Initialize Docker client"""
         try:
+            import docker
             self.docker_client = docker.from_env()
             self.docker_client.ping()
         except Exception as e:
             self.logger.warning(f"Failed to initialize Docker client: {e}")
             self.docker_client = None
     
+    def _get_docker_client(self):
+        """Return the Docker client, initializing it on first use
+        
+        None when Docker is unavailable; initialization is not retried.
+        """
+        with self._docker_client_lock:
+            if not self._docker_client_ready:
+                self._init_docker_client()
+                self._docker_client_ready = True
+        return self.docker_client
+    
+    def _http_session(self):
+        """Return the HTTP session for webhook alerts, creating it on first use"""
+        with self._http_lock:
+            if self._http is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+                
+                session = requests.Session()
+                session.headers['Content-Type'] = 'application/json'
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.1))
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._http = session
+            return self._http
+    
+    def _db_connect(self, db_path, read_only: bool = False) -> sqlite3.Connection:
+        """Open a SQLite connection with the per-connection tuning applied
+        
+        The monitoring databases run in WAL mode (set once in _init_databases,
+        it persists in the file), so readers never block the writer. With WAL,
+        synchronous=NORMAL skips the fsync on each commit: a power loss can
+        drop the last few samples or alerts but cannot corrupt the database,
+        which is an acceptable trade for monitoring data. The 5 s timeout is
+        SQLite's busy timeout, so a writer waits for a lock instead of failing.
+        
+        Read-only connections are opened with mode=ro and can never write.
+        Monitoring only opens databases owned by the application this way;
+        their upkeep, ANALYZE included, is left to system maintenance.
+        """
+        if read_only:
+            uri = f"{Path(db_path).absolute().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=5, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(str(db_path), timeout=5, check_same_thread=False)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-20000')
+        return conn
+    
+    @contextmanager
+    def _db(self, db_path, read_only: bool = False) -> Iterator[sqlite3.Connection]:
+        """Use the shared connection to db_path for one transaction
+        
+        The connection is opened on first use and kept for the lifetime of
+        the instance; the block commits on success and rolls back on error.
+        """
+        key = (str(db_path), read_only)
+        with self._connections_lock:
+            entry = self._connections.get(key)
+            if entry is None:
+                entry = (self._db_connect(db_path, read_only), threading.Lock())
+                self._connections[key] = entry
+        
+        conn, lock = entry
+        with lock, conn:
+            yield conn
+    
+    def close(self) -> None:
+        """Flush buffered metrics and close the shared database connections"""
+        if self._metric_history.unflushed_count:
+            self.flush_metrics()
+        
+        # Let the notifier finish sending queued alerts before its
+        # connections are closed, but not hold up shutdown indefinitely. The
+        # drain sends one alert after another: close() may be running from
+        # the atexit hook, where no new worker threads can be started
+        with self._notifier_lock:
+            notifier, self._notifier = self._notifier, None
+            self._notifier_draining = notifier is not None
+        
+        if notifier is not None:
+            self._notification_queue.put(None)
+            notifier.join(_NOTIFICATION_DRAIN_TIMEOUT_SECONDS)
+        
+        if notifier is not None and notifier.is_alive():
+            # Still sending: its connections are left to be dropped at exit
+            self.logger.warning("Alert notifier did not finish in time; pending notifications dropped")
+        else:
+            with self._smtp_lock:
+                self._close_smtp()
+            
+            with self._http_lock:
+                if self._http is not None:
+                    self._http.close()
+                    self._http = None
+        
+        with self._connections_lock:
+            connections, self._connections = self._connections, {}
+        
+        for conn, lock in connections.values():
+            with lock:
+                conn.close()
+    
     def _init_databases(self):
-        """Initialize monitoring databases"""
+        """Initialize monitoring databases
+        
+        auto_vacuum=INCREMENTAL only takes effect when a database is created,
+        so pages freed by retention pruning can be returned to the filesystem
+        by incremental_vacuum; existing databases keep their mode.
+        """
         try:
             # Alerts database
             self.alerts_db_path.parent.mkdir(parents=True, exist_ok=True)
-            with sqlite3.connect(str(self.alerts_db_path)) as conn:
+            with self._db(self.alerts_db_path) as conn:
+                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                conn.execute('PRAGMA journal_mode=WAL')
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS alerts (
                         id TEXT PRIMARY KEY,
@@ -174,7 +583,9 @@ class MonitoringAutomation:
                 ''')
             
             # Metrics database
-            with sqlite3.connect(str(self.metrics_db_path)) as conn:
+            with self._db(self.metrics_db_path) as conn:
+                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                conn.execute('PRAGMA journal_mode=WAL')
                 conn.execute('''
                     CREATE TABLE IF NOT EXISTS system_metrics (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -194,6 +605,30 @@ class MonitoringAutomation:
                 conn.execute('''
                     CREATE INDEX IF NOT EXISTS idx_metrics_name ON system_metrics(metric_name)
                 ''')
+                
+                # Metrics are stored one row per collection: a JSON array of
+                # [metric_name, metric_value, unit, source, metadata] entries
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS system_metrics_blob (
+                        timestamp DATETIME PRIMARY KEY,
+                        payload TEXT NOT NULL
+                    )
+                ''')
+                
+                # One row per metric, as system_metrics has, across both tables
+                conn.execute('''
+                    CREATE VIEW IF NOT EXISTS system_metrics_all AS
+                    SELECT timestamp, metric_name, metric_value, unit, source, metadata
+                    FROM system_metrics
+                    UNION ALL
+                    SELECT b.timestamp,
+                           json_extract(m.value, '$[0]'),
+                           json_extract(m.value, '$[1]'),
+                           json_extract(m.value, '$[2]'),
+                           json_extract(m.value, '$[3]'),
+                           json_extract(m.value, '$[4]')
+                    FROM system_metrics_blob b, json_each(b.payload) m
+                ''')
         
         except Exception as e:
             self.logger.error(f"Failed to initialize databases: {e}")
@@ -212,25 +647,56 @@ class MonitoringAutomation:
                 enabled=True
             )
             self.thresholds.append(warning_threshold)
+        
+        # check_thresholds compares all enabled thresholds at once against
+        # these parallel arrays, built once here rather than every cycle
+        enabled = [threshold for threshold in self.thresholds if threshold.enabled]
+        self._enabled_thresholds = enabled
+        self._threshold_lookup_keys = [
+            (_THRESHOLD_METRIC_PATHS.get(threshold.metric_name), threshold.metric_name)
+            for threshold in enabled
+        ]
+        self._warning_thresholds = np.array([t.warning_threshold for t in enabled], dtype=np.float64)
+        self._critical_thresholds = np.array([t.critical_threshold for t in enabled], dtype=np.float64)
+        comparisons = np.array([t.comparison for t in enabled], dtype=object)
+        self._compare_greater = comparisons == 'greater'
+        self._compare_less = comparisons == 'less'
+        self._compare_equal = comparisons == 'equal'
+    
+    def _exceeded(self, values: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+        """Mask of values exceeding their threshold under each comparison type"""
+        return (
+            (self._compare_greater & (values > thresholds))
+            | (self._compare_less & (values < thresholds))
+            | (self._compare_equal & (values == thresholds))
+        )
     
     def _get_metric_unit(self, metric_name: str) -> str:
         """Get appropriate unit for metric"""
-        unit_map = {
-            'cpu_usage': '%',
-            'memory_usage': '%', 
-            'disk_usage': '%',
-            'response_time': 'ms',
-            'database_connections': 'count',
-            'error_rate': '%',
-            'temperature': '°C',
-            'network_latency': 'ms'
-        }
-        return unit_map.get(metric_name, '')
+        return _UNIT_MAP.get(metric_name, '')
     
-    def collect_system_metrics(self) -> Dict[str, Any]:
-        """Collect comprehensive system metrics"""
+    def collect_system_metrics(self, timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """Collect comprehensive system metrics, stamped with timestamp (default now)"""
+        metrics = asyncio.run(self.collect_system_metrics_async(timestamp))
+        self._metrics_cache = (time.monotonic(), metrics)
+        return metrics
+    
+    def _get_cached_metrics(self, max_age: float = 5.0) -> Dict[str, Any]:
+        """Return metrics collected at most max_age seconds ago, collecting if needed"""
+        cached = self._metrics_cache
+        if cached is not None and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        return self.collect_system_metrics()
+    
+    async def collect_system_metrics_async(self, timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+        """Collect comprehensive system metrics
+        
+        The collectors are independent and block on psutil, the Docker API,
+        SQLite and sockets, so each runs in a worker thread and the
+        collection takes as long as the slowest one rather than their sum.
+        """
         metrics = {
-            'timestamp': datetime.now(),
+            'timestamp': timestamp or datetime.now(),
             'system': {},
             'application': {},
             'containers': {},
@@ -238,33 +704,43 @@ class MonitoringAutomation:
             'network': {}
         }
         
-        try:
-            # System metrics
-            metrics['system'] = self._collect_system_metrics()
-            
-            # Application metrics
-            metrics['application'] = self._collect_application_metrics()
-            
-            # Container metrics
-            if self.docker_client:
-                metrics['containers'] = self._collect_container_metrics()
-            
-            # Database metrics
-            metrics['database'] = self._collect_database_metrics()
-            
-            # Network metrics
-            metrics['network'] = self._collect_network_metrics()
-            
-        except Exception as e:
-            self.logger.error(f"Failed to collect metrics: {e}")
+        collectors = {
+            'system': self._collect_system_metrics,
+            'application': self._collect_application_metrics,
+            'database': self._collect_database_metrics,
+            'network': self._collect_network_metrics
+        }
+        if self._get_docker_client():
+            collectors['containers'] = self._collect_container_metrics
+        
+        async with asyncio.TaskGroup() as task_group:
+            tasks = {
+                name: task_group.create_task(self._run_collector(name, collector))
+                for name, collector in collectors.items()
+            }
+        
+        for name, task in tasks.items():
+            metrics[name] = task.result()
         
         return metrics
     
+    async def _run_collector(self, name: str, collector) -> Dict:
+        """Run a blocking collector in a worker thread
+        
+        A failing collector is logged and reported as empty, so it neither
+        cancels nor discards the other collectors' results.
+        """
+        try:
+            return await asyncio.to_thread(collector)
+        except Exception as e:
+            self.logger.error(f"Failed to collect {name} metrics: {e}")
+            return {}
+    
     def _collect_system_metrics(self) -> Dict:
         """Collect system-level metrics"""
         try:
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU metrics, averaged over the time since the previous collection
+            cpu_percent = psutil.cpu_percent(interval=None)
             cpu_count = psutil.cpu_count()
             
             # Memory metrics
@@ -345,46 +821,32 @@ class MonitoringAutomation:
     def _collect_container_metrics(self) -> Dict:
         """Collect container-specific metrics"""
         try:
-            container_metrics = {}
-            
             veeva_containers = ['veeva-data-quality-system', 'veeva-prometheus', 'veeva-grafana']
             
-            for container_name in veeva_containers:
-                try:
-                    container = self.docker_client.containers.get(container_name)
-                    
-                    # Get container stats
-                    stats = container.stats(stream=False)
-                    
-                    # Calculate CPU usage
-                    cpu_delta = stats['cpu_stats']['cpu_usage']['total_usage'] - \
-                               stats['precpu_stats']['cpu_usage']['total_usage']
-                    system_cpu_delta = stats['cpu_stats']['system_cpu_usage'] - \
-                                     stats['precpu_stats']['system_cpu_usage']
-                    
-                    cpu_usage = (cpu_delta / system_cpu_delta) * \
-                               len(stats['cpu_stats']['cpu_usage']['percpu_usage']) * 100.0
-                    
-                    # Calculate memory usage
-                    memory_usage = stats['memory_stats']['usage']
-                    memory_limit = stats['memory_stats']['limit']
-                    memory_percent = (memory_usage / memory_limit) * 100.0
-                    
-                    container_metrics[container_name] = {
-                        'status': container.status,
-                        'cpu_usage_percent': round(cpu_usage, 2),
-                        'memory_usage_mb': round(memory_usage / (1024**2), 2),
-                        'memory_limit_mb': round(memory_limit / (1024**2), 2),
-                        'memory_usage_percent': round(memory_percent, 2),
-                        'network_rx_bytes': stats['networks'].get('eth0', {}).get('rx_bytes', 0),
-                        'network_tx_bytes': stats['networks'].get('eth0', {}).get('tx_bytes', 0)
-                    }
-                    
-                except docker.errors.NotFound:
-                    container_metrics[container_name] = {'status': 'not_found'}
-                except Exception as e:
-                    self.logger.warning(f"Failed to get stats for {container_name}: {e}")
-                    container_metrics[container_name] = {'status': 'error', 'error': str(e)}
+            # Resolve every container, with its current status, in one list
+            # call; sparse keeps docker-py from inspecting each result, so
+            # names come from the list entry's Names rather than .name. The
+            # name filter matches substrings, so pick exact names
+            found = {
+                name.lstrip('/'): container
+                for container in self.docker_client.containers.list(
+                    all=True, sparse=True, filters={'name': veeva_containers}
+                )
+                for name in container.attrs.get('Names') or ()
+            }
+            
+            # Each stats call is a blocking round trip to the Docker daemon,
+            # so query all containers at once rather than one after another
+            with ThreadPoolExecutor(max_workers=len(veeva_containers)) as executor:
+                samples = list(executor.map(
+                    lambda name: self._collect_container_stats(name, found.get(name)),
+                    veeva_containers
+                ))
+            
+            container_metrics = {name: metrics for name, (metrics, _) in zip(veeva_containers, samples)}
+            sampled = [(name, raw) for name, (_, raw) in zip(veeva_containers, samples) if raw is not None]
+            if sampled:
+                self._add_container_usage(container_metrics, sampled)
             
             return container_metrics
             
@@ -392,43 +854,165 @@ class MonitoringAutomation:
             self.logger.error(f"Failed to collect container metrics: {e}")
             return {}
     
+    def _collect_container_stats(self, container_name: str, container) -> Tuple[Dict, Optional[Tuple]]:
+        """Collect metrics for a single container
+        
+        Returns the container's metrics together with its raw usage counters
+        (container id, CPU, system CPU, online CPUs, memory usage and limit),
+        or None when no stats were read; _add_container_usage turns the
+        counters of all containers into percentages.
+        """
+        import docker
+        
+        if container is None:
+            self._container_cpu_samples.pop(container_name, None)
+            return {'status': 'not_found'}, None
+        
+        try:
+            try:
+                stats = self.docker_client.api.stats(container.id, stream=False, one_shot=True)
+            except TypeError:
+                # Docker SDK releases before 6.0 have no one_shot
+                stats = self.docker_client.api.stats(container.id, stream=False)
+            
+            cpu_stats = stats['cpu_stats']
+            memory_stats = stats['memory_stats']
+            network_stats = stats['networks'].get('eth0', {})
+            
+            container_metrics = {
+                'status': container.status,
+                'memory_usage_mb': round(memory_stats['usage'] / (1024**2), 2),
+                'memory_limit_mb': round(memory_stats['limit'] / (1024**2), 2),
+                'network_rx_bytes': network_stats.get('rx_bytes', 0),
+                'network_tx_bytes': network_stats.get('tx_bytes', 0)
+            }
+            raw = (
+                container.id,
+                cpu_stats['cpu_usage']['total_usage'],
+                cpu_stats.get('system_cpu_usage', 0),
+                cpu_stats.get('online_cpus') or self._ncpu,
+                memory_stats['usage'],
+                memory_stats['limit']
+            )
+            return container_metrics, raw
+            
+        except docker.errors.NotFound:
+            self._container_cpu_samples.pop(container_name, None)
+            return {'status': 'not_found'}, None
+        except Exception as e:
+            self.logger.warning(f"Failed to get stats for {container_name}: {e}")
+            return {'status': 'error', 'error': str(e)}, None
+    
+    def _add_container_usage(self, container_metrics: Dict, sampled: List[Tuple[str, Tuple]]) -> None:
+        """Add CPU and memory percentages of the sampled containers
+        
+        Stats are requested one-shot, which skips the second CPU sample the
+        daemon otherwise takes about a second apart; CPU usage is computed
+        against each container's sample from the previous collection instead,
+        so it is only reported from the second collection on. The percentages
+        of all containers are computed together as arrays.
+        """
+        names = [name for name, _ in sampled]
+        container_ids = [raw[0] for _, raw in sampled]
+        counters = np.array([raw[1:] for _, raw in sampled], dtype=np.int64)
+        cpu_total, system_total, online_cpus, memory_usage, memory_limit = counters.T
+        
+        # Counters of the previous collection; without one for the same
+        # container the deltas are zero and no CPU usage is reported
+        previous = []
+        for name, container_id, cpu, system in zip(names, container_ids, cpu_total, system_total):
+            sample = self._container_cpu_samples.get(name)
+            previous.append(sample[1:] if sample is not None and sample[0] == container_id else (cpu, system))
+        previous = np.array(previous, dtype=np.int64)
+        
+        cpu_delta = cpu_total - previous[:, 0]
+        system_delta = system_total - previous[:, 1]
+        has_cpu_usage = system_delta > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cpu_percent = np.round(cpu_delta / system_delta * online_cpus * 100.0, 2)
+            memory_percent = np.round(memory_usage / memory_limit * 100.0, 2)
+        
+        for index, name in enumerate(names):
+            self._container_cpu_samples[name] = (container_ids[index], int(cpu_total[index]), int(system_total[index]))
+            if has_cpu_usage[index]:
+                container_metrics[name]['cpu_usage_percent'] = float(cpu_percent[index])
+            container_metrics[name]['memory_usage_percent'] = float(memory_percent[index])
+    
     def _collect_database_metrics(self) -> Dict:
-        """Collect database-specific metrics"""
+        """Collect database-specific metrics
+        
+        Row counts of tables that have sqlite_stat1 planner statistics are
+        reported as table_row_estimates, as of the last ANALYZE, which only
+        system maintenance runs; they avoid a COUNT(*) scan of every table.
+        Tables without statistics are counted exactly, under table_counts.
+        Per-table sizes are
+        measured daily in the background. The integrity check runs hourly;
+        in between, its last result is reported.
+        """
         try:
             metrics = {
                 'connection_count': 0,
                 'query_times': [],
                 'database_size_mb': 0,
-                'table_counts': {}
+                'table_counts': {},
+                'table_row_estimates': {}
             }
             
-            db_path = '/app/data/database/veeva_opendata.db'
+            db_path = _APP_DB_PATH
             if os.path.exists(db_path):
                 # Database size
                 metrics['database_size_mb'] = round(os.path.getsize(db_path) / (1024**2), 2)
+                now = time.monotonic()
                 
-                # Connection test and table counts
-                start_time = time.time()
-                with sqlite3.connect(db_path, timeout=5) as conn:
-                    query_time = (time.time() - start_time) * 1000
-                    metrics['query_times'].append(query_time)
-                    
+                # Connection test and table counts; the connection is kept
+                # open, so the timed query is the first one of the cycle
+                with self._db(db_path, read_only=True) as conn:
                     cursor = conn.cursor()
                     
                     # Get table counts
+                    start_time = time.time()
                     cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
                     tables = cursor.fetchall()
+                    query_time = (time.time() - start_time) * 1000
+                    metrics['query_times'].append(query_time)
+                    
+                    # The first stat field is the row count of the table
+                    # (idx NULL) or of one of its indexes; a partial index
+                    # holds fewer rows, so the largest one is the table's
+                    row_estimates = {}
+                    if any(table[0] == 'sqlite_stat1' for table in tables):
+                        row_estimates = dict(cursor.execute(
+                            "SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl"
+                        ).fetchall())
                     
                     for table in tables:
                         table_name = table[0]
-                        cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                        count = cursor.fetchone()[0]
-                        metrics['table_counts'][table_name] = count
+                        if table_name.startswith('sqlite_'):
+                            continue
+                        if table_name in row_estimates:
+                            metrics['table_row_estimates'][table_name] = row_estimates[table_name]
+                        else:
+                            # Not analyzed yet, or empty when it was
+                            quoted_name = table_name.replace('"', '""')
+                            cursor.execute(f'SELECT COUNT(*) FROM "{quoted_name}"')
+                            metrics['table_counts'][table_name] = cursor.fetchone()[0]
                     
                     # Database integrity check (quick)
-                    cursor.execute("PRAGMA quick_check(1)")
-                    integrity_result = cursor.fetchone()[0]
-                    metrics['integrity_status'] = integrity_result
+                    if self._last_integrity_check is None or now - self._last_integrity_check >= _INTEGRITY_CHECK_INTERVAL_SECONDS:
+                        cursor.execute("PRAGMA quick_check(1)")
+                        self._integrity_status = cursor.fetchone()[0]
+                        self._last_integrity_check = now
+                    metrics['integrity_status'] = self._integrity_status
+                
+                if self._table_sizes:
+                    metrics['table_sizes_mb'] = {
+                        table_name: round(size / (1024**2), 2)
+                        for table_name, size in self._table_sizes.items()
+                    }
+                
+                if self._last_table_sizes is None or now - self._last_table_sizes >= _TABLE_SIZES_INTERVAL_SECONDS:
+                    self._last_table_sizes = now
+                    threading.Thread(target=self._measure_table_sizes, args=(db_path,), daemon=True).start()
             
             return metrics
             
@@ -436,6 +1020,31 @@ class MonitoringAutomation:
             self.logger.error(f"Failed to collect database metrics: {e}")
             return {}
     
+    def _measure_table_sizes(self, db_path: str) -> None:
+        """Measure every table's size in a single dbstat query
+        
+        Only when SQLite is built with the dbstat virtual table; dbstat reads
+        every page, so it runs in the background rather than on each
+        collection, over a read-only connection of its own.
+        """
+        try:
+            conn = self._db_connect(db_path, read_only=True)
+            try:
+                compile_options = {row[0] for row in conn.execute('PRAGMA compile_options')}
+                if 'ENABLE_DBSTAT_VTAB' in compile_options:
+                    self._table_sizes = {
+                        table_name: size or 0
+                        for table_name, size in conn.execute('''
+                            SELECT m.name, (SELECT SUM(pgsize) FROM dbstat WHERE name = m.name)
+                            FROM sqlite_master m
+                            WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+                        ''')
+                    }
+            finally:
+                conn.close()
+        except Exception as e:
+            self.logger.warning(f"Failed to measure table sizes of {db_path}: {e}")
+    
     def _collect_network_metrics(self) -> Dict:
         """Collect network-specific metrics"""
         try:
@@ -445,14 +1054,7 @@ class MonitoringAutomation:
             }
             
             # Network connections
-            connections = psutil.net_connections()
-            established_connections = [conn for conn in connections if conn.status == 'ESTABLISHED']
-            
-            metrics['connections'] = {
-                'total': len(connections),
-                'established': len(established_connections),
-                'listening': len([conn for conn in connections if conn.status == 'LISTEN'])
-            }
+            metrics['connections'] = self._count_connections()
             
             # Basic latency tests to important endpoints
             test_endpoints = [
@@ -460,26 +1062,19 @@ class MonitoringAutomation:
                 ('localhost', 3000)   # Grafana
             ]
             
-            for host, port in test_endpoints:
-                try:
-                    start_time = time.time()
-                    import socket
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(2)
-                    result = sock.connect_ex((host, port))
-                    latency = (time.time() - start_time) * 1000
-                    sock.close()
-                    
-                    metrics['latency_tests'][f"{host}:{port}"] = {
-                        'latency_ms': round(latency, 2),
-                        'reachable': result == 0
-                    }
-                except Exception as e:
+            # Probe all endpoints concurrently, so unreachable ones cost one
+            # timeout in total rather than one each
+            results = asyncio.run(self._probe_endpoints(test_endpoints))
+            
+            for (host, port), result in zip(test_endpoints, results):
+                if isinstance(result, Exception):
                     metrics['latency_tests'][f"{host}:{port}"] = {
                         'latency_ms': -1,
                         'reachable': False,
-                        'error': str(e)
+                        'error': str(result)
                     }
+                else:
+                    metrics['latency_tests'][f"{host}:{port}"] = result
             
             return metrics
             
@@ -487,6 +1082,69 @@ class MonitoringAutomation:
             self.logger.error(f"Failed to collect network metrics: {e}")
             return {}
     
+    def _count_connections(self) -> Dict[str, int]:
+        """Count inet sockets in total and TCP ones by state
+        
+        Reads the kernel's /proc/net socket tables and counts the state
+        column directly, rather than building a psutil object per socket;
+        psutil is used where those tables are unavailable.
+        """
+        try:
+            states = Counter()
+            total = 0
+            tables_read = 0
+            for path in _PROC_NET_TCP_FILES + _PROC_NET_UDP_FILES:
+                if not os.path.exists(path):
+                    continue
+                with open(path, 'rb') as f:
+                    data = f.read()
+                tables_read += 1
+                found = _PROC_NET_STATE_RE.findall(data)
+                total += len(found)
+                if path in _PROC_NET_TCP_FILES:
+                    states.update(found)
+            
+            if tables_read:
+                return {
+                    'total': total,
+                    'established': states[b'01'],
+                    'listening': states[b'0A']
+                }
+            
+        except OSError:
+            pass
+        
+        # No /proc/net tables on this host (or they could not be read)
+        connections = psutil.net_connections()
+        return {
+            'total': len(connections),
+            'established': sum(1 for conn in connections if conn.status == 'ESTABLISHED'),
+            'listening': sum(1 for conn in connections if conn.status == 'LISTEN')
+        }
+    
+    async def _probe_endpoints(self, endpoints: List[Tuple[str, int]]) -> List:
+        """Probe TCP endpoints concurrently; failed probes are returned as exceptions"""
+        return await asyncio.gather(
+            *(self._probe_endpoint(host, port) for host, port in endpoints),
+            return_exceptions=True
+        )
+    
+    async def _probe_endpoint(self, host: str, port: int, timeout: float = 2) -> Dict:
+        """Measure how long a TCP connection to host:port takes to succeed or fail"""
+        start_time = time.time()
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+            writer.close()
+            reachable = True
+        except (OSError, asyncio.TimeoutError):
+            reachable = False
+        latency = (time.time() - start_time) * 1000
+        
+        return {
+            'latency_ms': round(latency, 2),
+            'reachable': reachable
+        }
+    
     def _perform_application_health_check(self) -> Dict:
         """Perform application health check"""
         try:
@@ -497,9 +1155,9 @@ class MonitoringAutomation:
             
             # Database connectivity
             try:
-                db_path = '/app/data/database/veeva_opendata.db'
+                db_path = _APP_DB_PATH
                 if os.path.exists(db_path):
-                    with sqlite3.connect(db_path, timeout=5) as conn:
+                    with self._db(db_path, read_only=True) as conn:
                         conn.execute("SELECT 1")
                         health_status['checks']['database'] = 'healthy'
                 else:
@@ -532,211 +1190,378 @@ class MonitoringAutomation:
             }
     
     def store_metrics(self, metrics: Dict) -> bool:
-        """Store collected metrics in database"""
+        """Store collected metrics
+        
+        Samples go into the in-memory metric history; it is flushed to the
+        database every metrics_flush_interval_seconds in one transaction,
+        and on close.
+        """
         try:
-            with sqlite3.connect(str(self.metrics_db_path)) as conn:
-                timestamp = metrics['timestamp'].isoformat()
+            metric_unit = _UNIT_MAP.get
+            samples = []
+            
+            # System metrics
+            system_metrics = metrics.get('system', {})
+            for category, data in system_metrics.items():
+                if isinstance(data, dict):
+                    metadata = _metadata_json('category', category)
+                    samples.extend(
+                        (
+                            (f"system.{category}.{metric_name}", metric_unit(metric_name, ''), 'system', metadata),
+                            value
+                        )
+                        for metric_name, value in data.items()
+                        if isinstance(value, (int, float))
+                    )
+            
+            # Container metrics
+            container_metrics = metrics.get('containers', {})
+            for container_name, data in container_metrics.items():
+                if isinstance(data, dict):
+                    metadata = _metadata_json('container', container_name)
+                    samples.extend(
+                        (
+                            (f"container.{metric_name}", metric_unit(metric_name, ''), container_name, metadata),
+                            value
+                        )
+                        for metric_name, value in data.items()
+                        if isinstance(value, (int, float))
+                    )
+            
+            # Database metrics
+            db_metrics = metrics.get('database', {})
+            metadata = _metadata_json('type', 'database')
+            samples.extend(
+                (
+                    (f"database.{metric_name}", metric_unit(metric_name, ''), 'database', metadata),
+                    value
+                )
+                for metric_name, value in db_metrics.items()
+                if isinstance(value, (int, float))
+            )
+            
+            self._metric_history.append(metrics['timestamp'], samples)
+            
+            flush_interval = self.config['monitoring']['metrics_flush_interval_seconds']
+            if time.monotonic() - self._last_metrics_flush >= flush_interval:
+                return self.flush_metrics()
+            return True
                 
-                # Store system metrics
-                system_metrics = metrics.get('system', {})
-                for category, data in system_metrics.items():
-                    if isinstance(data, dict):
-                        for metric_name, value in data.items():
-                            if isinstance(value, (int, float)):
-                                conn.execute('''
-                                    INSERT INTO system_metrics 
-                                    (timestamp, metric_name, metric_value, unit, source, metadata)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                ''', (
-                                    timestamp,
-                                    f"system.{category}.{metric_name}",
-                                    value,
-                                    self._get_metric_unit(metric_name),
-                                    'system',
-                                    json.dumps({'category': category})
-                                ))
+        except Exception as e:
+            self.logger.error(f"Failed to store metrics: {e}")
+            return False
+    
+    def flush_metrics(self) -> bool:
+        """Write the metric samples buffered since the last flush to the database
+        
+        Each collection's samples are packed into a single system_metrics_blob
+        row, so a flush inserts one row per collection rather than one per
+        metric; the system_metrics_all view unpacks them again.
+        
+        Flushes are serialized: a stored collection's samples are appended
+        to its row, so two flushes of the same unflushed samples (the cycle
+        thread and close(), say) would store them twice.
+        """
+        try:
+            with self._flush_lock:
+                written, rows = self._metric_history.unflushed_rows()
                 
-                # Store container metrics
-                container_metrics = metrics.get('containers', {})
-                for container_name, data in container_metrics.items():
-                    if isinstance(data, dict):
-                        for metric_name, value in data.items():
-                            if isinstance(value, (int, float)):
-                                conn.execute('''
-                                    INSERT INTO system_metrics 
-                                    (timestamp, metric_name, metric_value, unit, source, metadata)
-                                    VALUES (?, ?, ?, ?, ?, ?)
-                                ''', (
-                                    timestamp,
-                                    f"container.{metric_name}",
-                                    value,
-                                    self._get_metric_unit(metric_name),
-                                    container_name,
-                                    json.dumps({'container': container_name})
-                                ))
+                collections: Dict[str, List] = {}
+                for timestamp, *sample in rows:
+                    collections.setdefault(timestamp, []).append(sample)
                 
-                # Store database metrics
-                db_metrics = metrics.get('database', {})
-                for metric_name, value in db_metrics.items():
-                    if isinstance(value, (int, float)):
-                        conn.execute('''
-                            INSERT INTO system_metrics 
-                            (timestamp, metric_name, metric_value, unit, source, metadata)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        ''', (
-                            timestamp,
-                            f"database.{metric_name}",
-                            value,
-                            self._get_metric_unit(metric_name),
-                            'database',
-                            json.dumps({'type': 'database'})
-                        ))
+                with self._db(self.metrics_db_path) as conn:
+                    conn.executemany(_INSERT_METRICS_BLOB_SQL, [
+                        (timestamp, json.dumps(samples, separators=(',', ':')))
+                        for timestamp, samples in collections.items()
+                    ])
+                    conn.commit()
                 
-                conn.commit()
-                return True
+                self._metric_history.mark_flushed(written)
+                self._last_metrics_flush = time.monotonic()
+            return True
                 
         except Exception as e:
-            self.logger.error(f"Failed to store metrics: {e}")
+            self.logger.error(f"Failed to flush metrics: {e}")
             return False
     
     def check_thresholds(self, metrics: Dict) -> List[Alert]:
-        """Check metrics against thresholds and generate alerts"""
+        """Check metrics against thresholds and generate alerts
+        
+        Each incident gets its own id: its metric and severity plus the time
+        it first fired. An alert that keeps firing across cycles, or across
+        runs, reuses the id of its open incident rather than getting a new
+        one each time; once resolved, a re-fire starts a new incident.
+        """
         alerts = []
         
         try:
+            firing = self._get_firing_alerts()
+            
             # Extract flat metrics for threshold checking
             flat_metrics = self._flatten_metrics(metrics)
             
-            for threshold in self.thresholds:
-                if not threshold.enabled:
-                    continue
-                
+            # Look each threshold's metric up by its mapped path, then by
+            # its own name; missing metrics become NaN and never exceed
+            metric_values = [
+                flat_metrics[path] if path in flat_metrics else flat_metrics.get(name)
+                for path, name in self._threshold_lookup_keys
+            ]
+            values = np.array(
+                [np.nan if value is None else value for value in metric_values],
+                dtype=np.float64
+            )
+            
+            critical = self._exceeded(values, self._critical_thresholds)
+            warning = self._exceeded(values, self._warning_thresholds) & ~critical
+            
+            # Alerts are only built for the thresholds that were exceeded,
+            # all stamped with the collection time
+            now = metrics.get('timestamp') or datetime.now()
+            for index in np.flatnonzero(critical | warning):
+                threshold = self._enabled_thresholds[index]
                 metric_name = threshold.metric_name
-                metric_value = None
-                
-                # Map threshold names to actual metric paths
-                metric_mapping = {
-                    'cpu_usage': 'system.cpu.usage_percent',
-                    'memory_usage': 'system.memory.used_percent',
-                    'disk_usage': 'system.disk.used_percent',
-                    'response_time': 'application.response_times.avg',
-                    'database_connections': 'database.connection_count',
-                    'error_rate': 'application.error_rate'
-                }
-                
-                actual_metric_path = metric_mapping.get(metric_name)
-                if actual_metric_path and actual_metric_path in flat_metrics:
-                    metric_value = flat_metrics[actual_metric_path]
-                elif metric_name in flat_metrics:
-                    metric_value = flat_metrics[metric_name]
+                metric_value = metric_values[index]
                 
-                if metric_value is None:
-                    continue
+                if critical[index]:
+                    severity, threshold_value = 'critical', threshold.critical_threshold
+                else:
+                    severity, threshold_value = 'warning', threshold.warning_threshold
                 
-                # Check thresholds
-                if self._exceeds_threshold(metric_value, threshold.critical_threshold, threshold.comparison):
-                    alert = Alert(
-                        id=f"alert_{metric_name}_{int(time.time())}",
-                        severity='critical',
-                        title=f"Critical: {metric_name.replace('_', ' ').title()}",
-                        description=f"{metric_name} is {metric_value}{threshold.unit}, exceeding critical threshold of {threshold.critical_threshold}{threshold.unit}",
-                        timestamp=datetime.now(),
-                        source='monitoring',
-                        metric_name=metric_name,
-                        metric_value=metric_value,
-                        threshold=threshold.critical_threshold
-                    )
-                    alerts.append(alert)
-                    
-                elif self._exceeds_threshold(metric_value, threshold.warning_threshold, threshold.comparison):
-                    alert = Alert(
-                        id=f"alert_{metric_name}_{int(time.time())}",
-                        severity='warning',
-                        title=f"Warning: {metric_name.replace('_', ' ').title()}",
-                        description=f"{metric_name} is {metric_value}{threshold.unit}, exceeding warning threshold of {threshold.warning_threshold}{threshold.unit}",
-                        timestamp=datetime.now(),
-                        source='monitoring',
-                        metric_name=metric_name,
-                        metric_value=metric_value,
-                        threshold=threshold.warning_threshold
-                    )
-                    alerts.append(alert)
+                key = _alert_key(metric_name, severity)
+                alerts.append(Alert(
+                    id=firing.get(key) or f"{key}_{now.strftime('%Y%m%d_%H%M%S')}",
+                    severity=severity,
+                    title=f"{severity.title()}: {metric_name.replace('_', ' ').title()}",
+                    description=f"{metric_name} is {metric_value}{threshold.unit}, exceeding {severity} threshold of {threshold_value}{threshold.unit}",
+                    timestamp=now,
+                    source='monitoring',
+                    metric_name=metric_name,
+                    metric_value=metric_value,
+                    threshold=threshold_value
+                ))
             
         except Exception as e:
             self.logger.error(f"Failed to check thresholds: {e}")
         
         return alerts
     
+    def _get_firing_alerts(self) -> Dict[str, str]:
+        """Incident ids of the open threshold alerts, keyed by metric and severity
+        
+        Loaded from the alerts table on first use, so a one-shot run carries
+        on the incidents an earlier run opened, and resolves them.
+        """
+        if self._firing_alerts is None:
+            firing = {}
+            try:
+                with self._db(self.alerts_db_path) as conn:
+                    for alert_id, metric_name, severity in conn.execute(_FIRING_ALERTS_SQL):
+                        firing[_alert_key(metric_name, severity)] = alert_id
+            except Exception as e:
+                self.logger.error(f"Failed to load open alerts: {e}")
+            self._firing_alerts = firing
+        
+        return self._firing_alerts
+    
     def _flatten_metrics(self, metrics: Dict, prefix: str = '') -> Dict[str, float]:
-        """Flatten nested metrics dictionary"""
+        """Flatten nested metrics dictionary
+        
+        Walks the nested dictionaries with an explicit stack rather than
+        recursing into each one.
+        """
         flat = {}
+        stack = [(prefix, metrics)]
         
-        for key, value in metrics.items():
-            if key == 'timestamp':
-                continue
+        while stack:
+            current_prefix, current = stack.pop()
+            
+            for key, value in current.items():
+                if key == 'timestamp':
+                    continue
+                    
+                new_key = f"{current_prefix}.{key}" if current_prefix else key
                 
-            new_key = f"{prefix}.{key}" if prefix else key
-            
-            if isinstance(value, dict):
-                flat.update(self._flatten_metrics(value, new_key))
-            elif isinstance(value, (int, float)):
-                flat[new_key] = value
-            elif isinstance(value, list) and value and all(isinstance(x, (int, float)) for x in value):
-                # Handle lists of numbers (e.g., response times)
-                flat[f"{new_key}.avg"] = sum(value) / len(value)
-                flat[f"{new_key}.max"] = max(value)
-                flat[f"{new_key}.min"] = min(value)
+                if isinstance(value, dict):
+                    stack.append((new_key, value))
+                elif isinstance(value, (int, float)):
+                    flat[new_key] = value
+                elif isinstance(value, list) and value and all(isinstance(x, (int, float)) for x in value):
+                    # Handle lists of numbers (e.g., response times)
+                    values = np.asarray(value, dtype=np.float64)
+                    flat[f"{new_key}.avg"] = float(values.mean())
+                    flat[f"{new_key}.max"] = float(values.max())
+                    flat[f"{new_key}.min"] = float(values.min())
         
         return flat
     
-    def _exceeds_threshold(self, value: float, threshold: float, comparison: str) -> bool:
-        """Check if value exceeds threshold based on comparison type"""
-        if comparison == 'greater':
-            return value > threshold
-        elif comparison == 'less':
-            return value < threshold
-        elif comparison == 'equal':
-            return value == threshold
-        return False
+    def _alert_row(self, alert: Alert) -> Tuple:
+        """Column values of an alert, in alerts table insert order"""
+        return (
+            alert.id,
+            alert.severity,
+            alert.title,
+            alert.description,
+            alert.timestamp.isoformat(),
+            alert.source,
+            alert.metric_name,
+            alert.metric_value,
+            alert.threshold,
+            alert.resolved,
+            alert.resolved_at.isoformat() if alert.resolved_at else None
+        )
     
     def store_alert(self, alert: Alert) -> bool:
         """Store alert in database"""
+        return self.store_alerts([alert])
+    
+    def store_alerts(self, alerts: List[Alert], resolved_ids=(),
+                     resolved_at: Optional[datetime] = None) -> bool:
+        """Store a batch of alerts in database in a single transaction
+        
+        An alert whose id is already stored updates that row instead, so a
+        sustained incident keeps one row with its latest value and time.
+        Alerts in resolved_ids are marked resolved as of resolved_at (default
+        now) in the same transaction, so a monitoring cycle commits its alert
+        changes at once. The transaction begins IMMEDIATE, taking the write
+        lock up front so a busy database is waited on before any work is done.
+        Should one alert violate a constraint, the batch is rolled back and
+        the alerts are stored one by one, so only the offending ones are lost.
+        """
+        if not alerts and not resolved_ids:
+            return True
+        
+        rows = [self._alert_row(alert) for alert in alerts]
+        resolved_at = (resolved_at or datetime.now()).isoformat()
+        resolved_rows = [(resolved_at, alert_id) for alert_id in resolved_ids]
+        
         try:
-            with sqlite3.connect(str(self.alerts_db_path)) as conn:
-                conn.execute('''
-                    INSERT INTO alerts 
-                    (id, severity, title, description, timestamp, source, 
-                     metric_name, metric_value, threshold, resolved, resolved_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    alert.id,
-                    alert.severity,
-                    alert.title,
-                    alert.description,
-                    alert.timestamp.isoformat(),
-                    alert.source,
-                    alert.metric_name,
-                    alert.metric_value,
-                    alert.threshold,
-                    alert.resolved,
-                    alert.resolved_at.isoformat() if alert.resolved_at else None
-                ))
+            with self._db(self.alerts_db_path) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(_UPSERT_ALERT_SQL, rows)
+                conn.executemany(_RESOLVE_ALERT_SQL, resolved_rows)
+                conn.commit()
+            self._remember_alerts(rows, resolved_ids)
+            return True
+        
+        except sqlite3.IntegrityError as e:
+            self.logger.warning(f"Failed to store alert batch, storing alerts one by one: {e}")
+        except Exception as e:
+            self.logger.error(f"Failed to store alert: {e}")
+            return False
+        
+        stored = []
+        try:
+            with self._db(self.alerts_db_path) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                for row in rows:
+                    try:
+                        conn.execute(_UPSERT_ALERT_SQL, row)
+                        stored.append(row)
+                    except sqlite3.IntegrityError as e:
+                        self.logger.error(f"Failed to store alert {row[0]}: {e}")
+                conn.executemany(_RESOLVE_ALERT_SQL, resolved_rows)
                 conn.commit()
-                return True
+            self._remember_alerts(stored, resolved_ids)
+            return len(stored) == len(rows)
                 
         except Exception as e:
             self.logger.error(f"Failed to store alert: {e}")
             return False
     
+    def resolve_alerts(self, alert_ids, resolved_at: Optional[datetime] = None) -> bool:
+        """Mark the given alerts resolved as of resolved_at (default now)"""
+        if not alert_ids:
+            return True
+        
+        try:
+            resolved_at = (resolved_at or datetime.now()).isoformat()
+            with self._db(self.alerts_db_path) as conn:
+                conn.executemany(
+                    _RESOLVE_ALERT_SQL,
+                    [(resolved_at, alert_id) for alert_id in alert_ids]
+                )
+                conn.commit()
+            self._remember_alerts((), alert_ids)
+            return True
+                
+        except Exception as e:
+            self.logger.error(f"Failed to resolve alerts: {e}")
+            return False
+    
+    def _remember_alerts(self, rows, resolved_ids=()) -> None:
+        """Apply stored alert rows and resolutions to the recent alerts"""
+        with self._recent_alerts_lock:
+            recent = self._recent_alerts
+            if recent is None:
+                return  # Not loaded yet; loading reads these from the table
+            
+            for row in rows:
+                recent.pop(row[0], None)
+                recent[row[0]] = {
+                    'severity': row[1],
+                    'title': row[2],
+                    'description': row[3],
+                    'timestamp': row[4],
+                    'resolved': bool(row[9])
+                }
+            
+            for alert_id in resolved_ids:
+                if alert_id in recent:
+                    recent[alert_id]['resolved'] = True
+            
+            while len(recent) > _RECENT_ALERTS_CAPACITY:
+                recent.popitem(last=False)
+    
+    def _get_recent_alerts(self, since: str, limit: int = 10) -> List[Dict]:
+        """Newest alerts stored after since (an isoformat timestamp)
+        
+        Served from memory while this instance is the only writer. The
+        alerts table is read on first use, and again once PRAGMA
+        data_version shows that another connection (the scheduler, the
+        test-alert action, a second instance) has committed to it since.
+        """
+        with self._recent_alerts_lock:
+            with self._db(self.alerts_db_path) as conn:
+                data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if self._recent_alerts is not None and data_version == self._recent_alerts_version:
+                    rows = None
+                else:
+                    rows = conn.execute(_RECENT_ALERTS_SQL, (since, _RECENT_ALERTS_CAPACITY)).fetchall()
+            
+            if rows is not None:
+                self._recent_alerts_version = data_version
+                self._recent_alerts = OrderedDict(
+                    (row[0], {
+                        'severity': row[1],
+                        'title': row[2],
+                        'description': row[3],
+                        'timestamp': row[4],
+                        'resolved': bool(row[5])
+                    })
+                    for row in reversed(rows)
+                )
+            
+            recent_alerts = []
+            for alert in reversed(self._recent_alerts.values()):
+                if alert['timestamp'] > since:
+                    recent_alerts.append(dict(alert))
+                    if len(recent_alerts) == limit:
+                        break
+            return recent_alerts
+    
     def send_alert_notification(self, alert: Alert) -> bool:
         """Send alert notification via configured channels"""
+        if not (self._email_enabled or self._webhook_enabled):
+            return True
+        
         success = True
         
         try:
-            if self.config['notifications']['email']['from_address']:
+            if self._email_enabled:
                 success &= self._send_email_alert(alert)
             
-            if self.config['notifications']['webhook']['url']:
+            if self._webhook_enabled:
                 success &= self._send_webhook_alert(alert)
                 
         except Exception as e:
@@ -745,46 +1570,163 @@ class MonitoringAutomation:
         
         return success
     
+    def send_alerts_batch(self, alerts: List[Alert], concurrent: bool = True) -> int:
+        """Send notifications for a batch of alerts, returning how many succeeded
+        
+        Each notification blocks on SMTP and HTTP round trips, so they are
+        sent concurrently from worker threads instead of one after another;
+        the webhook receives the whole batch in a single request. With
+        concurrent=False they are sent one after another on the calling
+        thread, which also works during interpreter shutdown.
+        """
+        if not alerts:
+            return 0
+        
+        if not concurrent:
+            return sum(self._send_alerts_sequentially(alerts))
+        
+        return sum(asyncio.run(self._send_alerts_async(alerts)))
+    
+    def _send_alerts_sequentially(self, alerts: List[Alert]) -> List[bool]:
+        """Send notifications for alerts on the calling thread, returning each one's success"""
+        sent = [True] * len(alerts)
+        
+        if self._email_enabled:
+            sent = [self._send_email_alert(alert) for alert in alerts]
+        
+        if self._webhook_enabled and not self._send_webhook_alerts_batch(alerts):
+            sent = [False] * len(alerts)
+        
+        return sent
+    
+    async def _send_alerts_async(self, alerts: List[Alert]) -> List[bool]:
+        """Send notifications for alerts concurrently, returning each one's success"""
+        channels = []
+        
+        if self._email_enabled:
+            channels.append(asyncio.gather(
+                *(asyncio.to_thread(self._send_email_alert, alert) for alert in alerts)
+            ))
+        
+        if self._webhook_enabled:
+            channels.append(self._send_webhook_batch_async(alerts))
+        
+        # An alert counts as notified when every configured channel succeeded
+        results = await asyncio.gather(*channels)
+        return [all(sent) for sent in zip(*results)] if results else [True] * len(alerts)
+    
+    async def _send_webhook_batch_async(self, alerts: List[Alert]) -> List[bool]:
+        """Send alerts in one webhook request, returning the outcome for each alert"""
+        success = await asyncio.to_thread(self._send_webhook_alerts_batch, alerts)
+        return [success] * len(alerts)
+    
+    def queue_notifications(self, alerts: List[Alert]) -> None:
+        """Hand alerts to the background notifier for sending
+        
+        Without any notification channel in use nothing is queued, and the
+        notifier is never started.
+        """
+        if not alerts or not (self._email_enabled or self._webhook_enabled):
+            return
+        
+        with self._notifier_lock:
+            if self._notifier is None:
+                self._notifier = threading.Thread(
+                    target=self._notification_worker, name='alert-notifier', daemon=True
+                )
+                self._notifier_draining = False
+                self._notifier.start()
+            self._notifications_pending += len(alerts)
+        
+        for alert in alerts:
+            self._notification_queue.put(alert)
+    
+    def wait_for_notifications(self, timeout: float = _NOTIFICATION_DRAIN_TIMEOUT_SECONDS) -> bool:
+        """Wait up to timeout seconds for queued notifications to be sent
+        
+        Returns False if some were still pending when the timeout expired.
+        """
+        with self._notifications_done:
+            return self._notifications_done.wait_for(lambda: not self._notifications_pending, timeout)
+    
+    def take_notifications_sent(self) -> int:
+        """Number of notifications the background notifier sent since the last call"""
+        with self._notifier_lock:
+            sent, self._notifications_sent = self._notifications_sent, 0
+        return sent
+    
+    def _notification_worker(self) -> None:
+        """Send queued alert notifications in batches
+        
+        After the first alert arrives, more are gathered for up to
+        _NOTIFICATION_BATCH_WAIT_SECONDS (at most _NOTIFICATION_BATCH_SIZE),
+        so alerts raised together go out as one batch. Returns once it takes
+        None from the queue, after sending the alerts queued before it.
+        """
+        stopping = False
+        while not stopping:
+            alert = self._notification_queue.get()
+            if alert is None:
+                return
+            
+            batch = [alert]
+            deadline = time.monotonic() + _NOTIFICATION_BATCH_WAIT_SECONDS
+            while len(batch) < _NOTIFICATION_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    alert = self._notification_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if alert is None:
+                    stopping = True
+                    break
+                batch.append(alert)
+            
+            sent = 0
+            try:
+                sent = self.send_alerts_batch(batch, concurrent=not self._notifier_draining)
+            except Exception as e:
+                self.logger.error(f"Failed to send queued alert notifications: {e}")
+            finally:
+                with self._notifications_done:
+                    self._notifications_sent += sent
+                    self._notifications_pending -= len(batch)
+                    self._notifications_done.notify_all()
+    
     def _send_email_alert(self, alert: Alert) -> bool:
         """Send email alert notification"""
         try:
             email_config = self.config['notifications']['email']
             
             # Create message
-            msg = MIMEMultipart()
+            msg = EmailMessage()
             msg['From'] = email_config['from_address']
             msg['To'] = ', '.join(email_config['to_addresses'])
             msg['Subject'] = f"[{alert.severity.upper()}] Veeva System Alert: {alert.title}"
             
             # Create email body
-            body = f"""
-            Alert Details:
-            =============
-            Severity: {alert.severity.upper()}
-            Title: {alert.title}
-            Description: {alert.description}
-            Timestamp: {alert.timestamp}
-            Source: {alert.source}
-            
-            Metric Information:
-            - Metric: {alert.metric_name}
-            - Current Value: {alert.metric_value}
-            - Threshold: {alert.threshold}
-            
-            Alert ID: {alert.id}
-            
-            This is an automated alert from the Veeva Data Quality System monitoring.
-            """
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            # Send email
-            with smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port']) as server:
-                if email_config['username'] and email_config['password']:
-                    server.starttls()
-                    server.login(email_config['username'], email_config['password'])
-                
-                server.send_message(msg)
+            msg.set_content(_EMAIL_ALERT_TEMPLATE.format(
+                severity=alert.severity.upper(),
+                title=alert.title,
+                description=alert.description,
+                timestamp=alert.timestamp,
+                source=alert.source,
+                metric_name=alert.metric_name,
+                metric_value=alert.metric_value,
+                threshold=alert.threshold,
+                id=alert.id
+            ))
+            
+            # Send email over the shared connection; after a failure it is
+            # dropped, so the next alert reconnects
+            with self._smtp_lock:
+                try:
+                    self._get_smtp().send_message(msg)
+                except Exception:
+                    self._close_smtp()
+                    raise
             
             self.logger.info(f"Email alert sent for {alert.id}")
             return True
@@ -793,6 +1735,50 @@ class MonitoringAutomation:
             self.logger.error(f"Failed to send email alert: {e}")
             return False
     
+    def _get_smtp(self) -> 'smtplib.SMTP':
+        """Return the shared SMTP connection, reconnecting if it has dropped
+        
+        Keeping the connection open spares each alert the connect, STARTTLS
+        and login round trips. Call with _smtp_lock held.
+        """
+        import smtplib
+        
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_smtp()
+        
+        email_config = self.config['notifications']['email']
+        server = smtplib.SMTP(
+            email_config['smtp_server'], email_config['smtp_port'], timeout=email_config['timeout']
+        )
+        try:
+            if email_config['username'] and email_config['password']:
+                server.starttls()
+                server.login(email_config['username'], email_config['password'])
+        except Exception:
+            server.close()
+            raise
+        
+        self._smtp = server
+        return server
+    
+    def _close_smtp(self) -> None:
+        """Close the shared SMTP connection, if open; call with _smtp_lock held"""
+        server, self._smtp = self._smtp, None
+        if server is None:
+            return
+        
+        import smtplib
+        
+        try:
+            server.quit()
+        except (smtplib.SMTPException, OSError):
+            server.close()
+    
     def _send_webhook_alert(self, alert: Alert) -> bool:
         """Send webhook alert notification"""
         try:
@@ -804,11 +1790,11 @@ class MonitoringAutomation:
                 'timestamp': datetime.now().isoformat()
             }
             
-            response = requests.post(
+            # Alerts carry datetimes, which the json= argument cannot encode
+            response = self._http_session().post(
                 webhook_config['url'],
-                json=payload,
-                timeout=webhook_config['timeout'],
-                headers={'Content-Type': 'application/json'}
+                data=json.dumps(payload, default=str),
+                timeout=webhook_config['timeout']
             )
             
             response.raise_for_status()
@@ -819,6 +1805,31 @@ class MonitoringAutomation:
             self.logger.error(f"Failed to send webhook alert: {e}")
             return False
     
+    def _send_webhook_alerts_batch(self, alerts: List[Alert]) -> bool:
+        """Send several alerts in a single webhook notification"""
+        try:
+            webhook_config = self.config['notifications']['webhook']
+            
+            payload = {
+                'alerts': [alert.to_dict() for alert in alerts],
+                'system': 'veeva-data-quality-system',
+                'timestamp': datetime.now().isoformat()
+            }
+            
+            response = self._http_session().post(
+                webhook_config['url'],
+                data=json.dumps(payload, default=str),
+                timeout=webhook_config['timeout']
+            )
+            
+            response.raise_for_status()
+            self.logger.info(f"Webhook alerts sent for {', '.join(alert.id for alert in alerts)}")
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Failed to send webhook alerts: {e}")
+            return False
+    
     def attempt_auto_remediation(self, alert: Alert) -> Dict:
         """Attempt automated remediation for alert"""
         remediation_result = {
@@ -847,14 +1858,28 @@ class MonitoringAutomation:
             
             elif alert.metric_name in ['cpu_usage', 'memory_usage'] and alert.severity == 'critical':
                 # Container restart remediation
-                if self.config['auto_remediation']['restart_unhealthy_containers'] and self.docker_client:
-                    containers = self.docker_client.containers.list()
-                    for container in containers:
-                        if 'veeva' in container.name.lower():
-                            container.restart()
-                            remediation_result['actions'].append(f"Restarted container {container.name}")
+                if self.config['auto_remediation']['restart_unhealthy_containers'] and self._get_docker_client():
+                    containers = self.docker_client.containers.list(filters={'name': '(?i)veeva'})
                     
-                    if remediation_result['actions']:
+                    # Each restart blocks until the container has stopped and
+                    # started again, so restart all of them at once
+                    if containers:
+                        errors = []
+                        with ThreadPoolExecutor(max_workers=min(8, len(containers))) as executor:
+                            futures = {executor.submit(container.restart): container for container in containers}
+                            for future in as_completed(futures):
+                                container = futures[future]
+                                try:
+                                    future.result()
+                                    remediation_result['actions'].append(f"Restarted container {container.name}")
+                                except Exception as e:
+                                    errors.append(f"{container.name}: {e}")
+                        
+                        if errors:
+                            remediation_result['error'] = '; '.join(errors)
+                            self.logger.error(f"Auto-remediation failed for {alert.id}: {remediation_result['error']}")
+                    
+                    if remediation_result['actions'] and not remediation_result['error']:
                         remediation_result['successful'] = True
             
         except Exception as e:
@@ -863,12 +1888,23 @@ class MonitoringAutomation:
         
         return remediation_result
     
-    def run_monitoring_cycle(self) -> Dict:
-        """Run complete monitoring cycle"""
+    def run_monitoring_cycle(self, wait_for_notifications: bool = False) -> Dict:
+        """Run complete monitoring cycle
+        
+        Notifications are sent by a background notifier, so the cycle does
+        not wait on SMTP and webhook round trips; notifications_sent counts
+        those it completed since the previous cycle. With
+        wait_for_notifications, the cycle waits until its own are sent, for
+        at most _NOTIFICATION_DRAIN_TIMEOUT_SECONDS.
+        """
+        # One timestamp for the whole cycle: the metrics, the alerts raised
+        # from them and the alerts they resolve
+        now = datetime.now()
         cycle_result = {
-            'timestamp': datetime.now(),
+            'timestamp': now,
             'metrics_collected': False,
             'alerts_generated': 0,
+            'notifications_queued': 0,
             'notifications_sent': 0,
             'remediations_attempted': 0,
             'errors': []
@@ -876,30 +1912,51 @@ class MonitoringAutomation:
         
         try:
             # Collect metrics
-            metrics = self.collect_system_metrics()
+            metrics = self.collect_system_metrics(now)
             if metrics:
                 # Store metrics
                 if self.store_metrics(metrics):
                     cycle_result['metrics_collected'] = True
                 
                 # Check thresholds and generate alerts
+                previously_firing = set(self._get_firing_alerts().values())
                 alerts = self.check_thresholds(metrics)
                 cycle_result['alerts_generated'] = len(alerts)
                 
+                # Only alerts that started firing this cycle are notified;
+                # alerts that stopped firing are resolved, in the same
+                # transaction that stores the cycle's alerts
+                firing = {alert.id for alert in alerts}
+                self.store_alerts(alerts, previously_firing - firing, now)
+                newly_firing = firing - previously_firing
+                self._firing_alerts = {
+                    _alert_key(alert.metric_name, alert.severity): alert.id for alert in alerts
+                }
+                
+                # Queue notifications
+                if self._email_enabled or self._webhook_enabled:
+                    notify = [alert for alert in alerts if alert.id in newly_firing]
+                    self.queue_notifications(notify)
+                    cycle_result['notifications_queued'] = len(notify)
+                
                 # Process each alert
                 for alert in alerts:
-                    # Store alert
-                    self.store_alert(alert)
-                    
-                    # Send notifications
-                    if self.send_alert_notification(alert):
-                        cycle_result['notifications_sent'] += 1
-                    
                     # Attempt auto-remediation
                     if alert.severity == 'critical':
                         remediation_result = self.attempt_auto_remediation(alert)
                         if remediation_result['attempted']:
                             cycle_result['remediations_attempted'] += 1
+            
+            # Prune data past the retention period so the tables and their
+            # indexes stay bounded
+            monotonic_now = time.monotonic()
+            if self._last_retention_prune is None or monotonic_now - self._last_retention_prune >= _RETENTION_PRUNE_INTERVAL_SECONDS:
+                self._last_retention_prune = monotonic_now
+                self.cleanup_old_data(now)
+            
+            if wait_for_notifications and not self.wait_for_notifications():
+                cycle_result['errors'].append("Timed out waiting for notifications to be sent")
+            cycle_result['notifications_sent'] = self.take_notifications_sent()
         
         except Exception as e:
             self.logger.error(f"Monitoring cycle failed: {e}")
@@ -907,8 +1964,13 @@ class MonitoringAutomation:
         
         return cycle_result
     
-    def cleanup_old_data(self) -> Dict:
-        """Clean up old monitoring data"""
+    def cleanup_old_data(self, now: Optional[datetime] = None) -> Dict:
+        """Clean up old monitoring data
+        
+        Runs from the monitoring cycle every _RETENTION_PRUNE_INTERVAL_SECONDS
+        as well as from the cleanup action. Each prune returns at most
+        _INCREMENTAL_VACUUM_PAGES free pages, keeping the work per run short.
+        """
         cleanup_result = {
             'alerts_cleaned': 0,
             'metrics_cleaned': 0,
@@ -917,27 +1979,29 @@ class MonitoringAutomation:
         
         try:
             retention_days = self.config['monitoring']['retention_days']
-            cutoff_date = datetime.now() - timedelta(days=retention_days)
+            cutoff = ((now or datetime.now()) - timedelta(days=retention_days)).isoformat()
             
             # Clean old alerts
-            with sqlite3.connect(str(self.alerts_db_path)) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM alerts WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                alerts_count = cursor.fetchone()[0]
-                
-                cursor.execute('DELETE FROM alerts WHERE timestamp < ?', (cutoff_date.isoformat(),))
+            with self._db(self.alerts_db_path) as conn:
+                cursor = conn.execute('DELETE FROM alerts WHERE timestamp < ?', (cutoff,))
+                alerts_count = cursor.rowcount
                 conn.commit()
                 cleanup_result['alerts_cleaned'] = alerts_count
+                
+                if alerts_count:
+                    conn.executescript(f'PRAGMA incremental_vacuum({_INCREMENTAL_VACUUM_PAGES});')
             
             # Clean old metrics
-            with sqlite3.connect(str(self.metrics_db_path)) as conn:
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM system_metrics WHERE timestamp < ?', (cutoff_date.isoformat(),))
-                metrics_count = cursor.fetchone()[0]
-                
-                cursor.execute('DELETE FROM system_metrics WHERE timestamp < ?', (cutoff_date.isoformat(),))
+            with self._db(self.metrics_db_path) as conn:
+                cursor = conn.execute('DELETE FROM system_metrics WHERE timestamp < ?', (cutoff,))
+                metrics_count = cursor.rowcount
+                cursor = conn.execute('DELETE FROM system_metrics_blob WHERE timestamp < ?', (cutoff,))
+                metrics_count += cursor.rowcount
                 conn.commit()
                 cleanup_result['metrics_cleaned'] = metrics_count
+                
+                if metrics_count:
+                    conn.executescript(f'PRAGMA incremental_vacuum({_INCREMENTAL_VACUUM_PAGES});')
         
         except Exception as e:
             cleanup_result['errors'].append(str(e))
@@ -948,41 +2012,29 @@ class MonitoringAutomation:
     def get_system_status(self) -> Dict:
         """Get comprehensive system status"""
         try:
-            # Get recent metrics
-            metrics = self.collect_system_metrics()
+            # Get recent metrics; a collection from the last few seconds,
+            # such as a monitoring cycle's, is reused
+            metrics = self._get_cached_metrics()
+            
+            now = datetime.now()
             
             # Get recent alerts
             recent_alerts = []
             try:
-                with sqlite3.connect(str(self.alerts_db_path)) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        SELECT severity, title, description, timestamp, resolved
-                        FROM alerts 
-                        WHERE timestamp > datetime('now', '-1 hour')
-                        ORDER BY timestamp DESC
-                        LIMIT 10
-                    ''')
-                    
-                    for row in cursor.fetchall():
-                        recent_alerts.append({
-                            'severity': row[0],
-                            'title': row[1],
-                            'description': row[2],
-                            'timestamp': row[3],
-                            'resolved': bool(row[4])
-                        })
+                # Alert timestamps are kept as local isoformat strings, so
+                # the cutoff is compared in the same format
+                since = (now - timedelta(hours=1)).isoformat()
+                recent_alerts = self._get_recent_alerts(since)
             except Exception:
                 pass  # Database might not exist yet
             
             # Determine overall health
-            health_issues = []
-            if metrics.get('system', {}).get('cpu', {}).get('usage_percent', 0) > 90:
-                health_issues.append('High CPU usage')
-            if metrics.get('system', {}).get('memory', {}).get('used_percent', 0) > 90:
-                health_issues.append('High memory usage')
-            if metrics.get('system', {}).get('disk', {}).get('used_percent', 0) > 95:
-                health_issues.append('Critical disk usage')
+            system_metrics = metrics.get('system', {})
+            health_issues = [
+                issue
+                for category, metric_name, limit, issue in _HEALTH_ISSUE_CHECKS
+                if system_metrics.get(category, {}).get(metric_name, 0) > limit
+            ]
             
             overall_health = 'healthy'
             if any(alert['severity'] == 'critical' and not alert['resolved'] for alert in recent_alerts):
@@ -996,7 +2048,7 @@ class MonitoringAutomation:
                 'current_metrics': metrics,
                 'recent_alerts': recent_alerts,
                 'monitoring_status': 'active',
-                'last_check': datetime.now().isoformat()
+                'last_check': now.isoformat()
             }
             
         except Exception as e:
@@ -1025,101 +2077,120 @@ def main():
     
     monitoring = MonitoringAutomation(config_path=args.config)
     
-    if args.action == 'run':
-        if args.continuous:
-            print(f"🔍 Starting continuous monitoring (interval: {args.interval}s)")
-            try:
-                while True:
-                    result = monitoring.run_monitoring_cycle()
+    try:
+        if args.action == 'run':
+            if args.continuous:
+                print(f"🔍 Starting continuous monitoring (interval: {args.interval}s)")
+                try:
+                    # Cycles start on a fixed schedule, so the time a cycle takes
+                    # does not stretch the interval between them
+                    next_tick = time.monotonic()
+                    while True:
+                        result = monitoring.run_monitoring_cycle()
                     
-                    if not args.json:
-                        print(f"[{result['timestamp']}] Cycle complete - "
-                              f"Alerts: {result['alerts_generated']}, "
-                              f"Notifications: {result['notifications_sent']}")
+                        if not args.json:
+                            print(f"[{result['timestamp']}] Cycle complete - "
+                                  f"Alerts: {result['alerts_generated']}, "
+                                  f"Notifications: {result['notifications_sent']}")
                     
-                    time.sleep(args.interval)
-            except KeyboardInterrupt:
-                print("\n🛑 Monitoring stopped by user")
-        else:
-            result = monitoring.run_monitoring_cycle()
+                        next_tick += args.interval
+                        delay = next_tick - time.monotonic()
+                        if delay < 0:
+                            # The cycle overran its interval: start the next one
+                            # now rather than running the missed ones back to back
+                            monitoring.logger.warning(
+                                f"Monitoring cycle overran the {args.interval}s interval by {-delay:.1f}s"
+                            )
+                            next_tick = time.monotonic()
+                            delay = 0.0
+                    
+                        time.sleep(delay)
+                except KeyboardInterrupt:
+                    print("\n🛑 Monitoring stopped by user")
+            else:
+                result = monitoring.run_monitoring_cycle(wait_for_notifications=True)
             
+                if args.json:
+                    print(json.dumps(result, indent=2, default=str))
+                else:
+                    print("🔍 Monitoring cycle completed")
+                    print(f"   📊 Metrics collected: {'Yes' if result['metrics_collected'] else 'No'}")
+                    print(f"   🚨 Alerts generated: {result['alerts_generated']}")
+                    print(f"   📧 Notifications sent: {result['notifications_sent']}")
+                    print(f"   🔧 Remediations attempted: {result['remediations_attempted']}")
+                
+                    if result['errors']:
+                        print("   ⚠️ Errors:")
+                        for error in result['errors']:
+                            print(f"     - {error}")
+    
+        elif args.action == 'status':
+            status = monitoring.get_system_status()
+        
             if args.json:
-                print(json.dumps(result, indent=2, default=str))
+                print(json.dumps(status, indent=2, default=str))
             else:
-                print("🔍 Monitoring cycle completed")
-                print(f"   📊 Metrics collected: {'Yes' if result['metrics_collected'] else 'No'}")
-                print(f"   🚨 Alerts generated: {result['alerts_generated']}")
-                print(f"   📧 Notifications sent: {result['notifications_sent']}")
-                print(f"   🔧 Remediations attempted: {result['remediations_attempted']}")
-                
+                health_icon = {
+                    'healthy': '✅',
+                    'warning': '⚠️',
+                    'critical': '🔴',
+                    'error': '❌'
+                }.get(status['overall_health'], '❓')
+            
+                print(f"{health_icon} System Health: {status['overall_health'].upper()}")
+            
+                if status.get('health_issues'):
+                    print("⚠️ Health Issues:")
+                    for issue in status['health_issues']:
+                        print(f"   • {issue}")
+            
+                if status.get('recent_alerts'):
+                    print(f"\n🚨 Recent Alerts ({len(status['recent_alerts'])}):")
+                    for alert in status['recent_alerts'][:5]:
+                        status_icon = "✅" if alert['resolved'] else "🔴"
+                        print(f"   {status_icon} [{alert['severity'].upper()}] {alert['title']}")
+    
+        elif args.action == 'cleanup':
+            result = monitoring.cleanup_old_data()
+        
+            if args.json:
+                print(json.dumps(result, indent=2))
+            else:
+                print("🧹 Data cleanup completed")
+                print(f"   🚨 Alerts cleaned: {result['alerts_cleaned']}")
+                print(f"   📊 Metrics cleaned: {result['metrics_cleaned']}")
+            
                 if result['errors']:
                     print("   ⚠️ Errors:")
                     for error in result['errors']:
                         print(f"     - {error}")
     
-    elif args.action == 'status':
-        status = monitoring.get_system_status()
-        
-        if args.json:
-            print(json.dumps(status, indent=2, default=str))
-        else:
-            health_icon = {
-                'healthy': '✅',
-                'warning': '⚠️',
-                'critical': '🔴',
-                'error': '❌'
-            }.get(status['overall_health'], '❓')
-            
-            print(f"{health_icon} System Health: {status['overall_health'].upper()}")
-            
-            if status.get('health_issues'):
-                print("⚠️ Health Issues:")
-                for issue in status['health_issues']:
-                    print(f"   • {issue}")
-            
-            if status.get('recent_alerts'):
-                print(f"\n🚨 Recent Alerts ({len(status['recent_alerts'])}):")
-                for alert in status['recent_alerts'][:5]:
-                    status_icon = "✅" if alert['resolved'] else "🔴"
-                    print(f"   {status_icon} [{alert['severity'].upper()}] {alert['title']}")
-    
-    elif args.action == 'cleanup':
-        result = monitoring.cleanup_old_data()
-        
-        if args.json:
-            print(json.dumps(result, indent=2))
-        else:
-            print("🧹 Data cleanup completed")
-            print(f"   🚨 Alerts cleaned: {result['alerts_cleaned']}")
-            print(f"   📊 Metrics cleaned: {result['metrics_cleaned']}")
-            
-            if result['errors']:
-                print("   ⚠️ Errors:")
-                for error in result['errors']:
-                    print(f"     - {error}")
-    
-    elif args.action == 'test-alert':
-        # Generate a test alert
-        test_alert = Alert(
-            id=f"test_alert_{int(time.time())}",
-            severity='warning',
-            title='Test Alert',
-            description='This is a test alert to verify notification systems are working',
-            timestamp=datetime.now(),
-            source='test',
-            metric_name='test_metric',
-            metric_value=100,
-            threshold=50
-        )
+        elif args.action == 'test-alert':
+            # Generate a test alert
+            test_alert = Alert(
+                id=f"test_alert_{int(time.time())}",
+                severity='warning',
+                title='Test Alert',
+                description='This is a test alert to verify notification systems are working',
+                timestamp=datetime.now(),
+                source='test',
+                metric_name='test_metric',
+                metric_value=100,
+                threshold=50
+            )
         
-        monitoring.store_alert(test_alert)
-        success = monitoring.send_alert_notification(test_alert)
+            monitoring.store_alert(test_alert)
+            success = monitoring.send_alert_notification(test_alert)
         
-        if success:
-            print("✅ Test alert sent successfully")
-        else:
-            print("❌ Failed to send test alert")
+            if success:
+                print("✅ Test alert sent successfully")
+            else:
+                print("❌ Failed to send test alert")
 
+    finally:
+        # Drain queued notifications while the interpreter is fully up;
+        # the atexit hook is only a backstop
+        monitoring.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -6,13 +6,15 @@ Handles scheduled maintenance, health checks, and system optimization
 
 import os
 import sys
+import copy
 import json
 import logging
 import subprocess
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
 import docker
 import psutil
 import time
@@ -20,12 +22,22 @@ import time
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
+# Parsed config files by path, with the modification time and size they were
+# parsed at, so an unchanged file is not read again by each new instance
+_CONFIG_CACHE: Dict[str, Tuple[int, int, Dict]] = {}
+
+# PRAGMA optimize considers every table, not only those the connection
+# queried, with mask bit 0x10000, which SQLite supports from 3.46
+_OPTIMIZE_ALL_TABLES = sqlite3.sqlite_version_info >= (3, 46)
+
 class SystemMaintenanceAutomation:
     """Comprehensive system maintenance and optimization"""
     
     def __init__(self, config_path: str = None):
         self.config = self._load_config(config_path)
         self.docker_client = None
+        # Databases already switched to WAL by this instance
+        self._wal_databases = set()
         self._setup_logging()
         self._init_docker_client()
         
@@ -34,8 +46,9 @@ class SystemMaintenanceAutomation:
         default_config = {
             'database_optimization': {
                 'vacuum_enabled': True,
+                'vacuum_page_limit': 2000,
                 'analyze_enabled': True,
-                'reindex_enabled': True,
+                'force_reindex': False,
                 'integrity_check': True,
                 'backup_before_maintenance': True
             },
@@ -61,9 +74,17 @@ class SystemMaintenanceAutomation:
         
         if config_path and os.path.exists(config_path):
             try:
-                with open(config_path, 'r') as f:
-                    user_config = json.load(f)
-                    default_config.update(user_config)
+                stat = os.stat(config_path)
+                cached = _CONFIG_CACHE.get(config_path)
+                if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                    user_config = cached[2]
+                else:
+                    with open(config_path, 'r') as f:
+                        user_config = json.load(f)
+                    _CONFIG_CACHE[config_path] = (stat.st_mtime_ns, stat.st_size, user_config)
+                
+                # Copied, so changes to this instance's config stay out of the cache
+                default_config.update(copy.deepcopy(user_config))
             except Exception as e:
                 print(f"Warning: Failed to load config from {config_path}: {e}")
         
@@ -87,6 +108,49 @@ class SystemMaintenanceAutomation:
             self.logger.warning(f"Failed to initialize Docker client: {e}")
             self.docker_client = None
     
+    @contextmanager
+    def _open_db(self, db_path: str, timeout: float = 30, read_only: bool = False) -> Iterator[sqlite3.Connection]:
+        """Use a SQLite connection tuned for maintenance work, closed after
+        
+        Connections run in autocommit mode, so VACUUM and ANALYZE are never
+        inside a transaction. A database is switched to WAL once per instance
+        (the mode persists in the file), so maintenance does not block the
+        application's readers; the other pragmas apply per connection and
+        match the application's own. Read-only connections, used for health
+        checks, are opened with mode=ro and never take a write lock.
+        
+        Writable connections follow SQLite's advice for statistics upkeep:
+        PRAGMA optimize=0x10002 when opened (on SQLite 3.46 and later, which
+        support the mask) and a bare PRAGMA optimize before closing, both
+        bounded by analysis_limit.
+        """
+        if read_only:
+            uri = f"{Path(db_path).absolute().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=timeout, isolation_level=None)
+        else:
+            conn = sqlite3.connect(db_path, timeout=timeout, isolation_level=None)
+            if db_path not in self._wal_databases:
+                conn.execute('PRAGMA journal_mode=WAL')
+                self._wal_databases.add(db_path)
+        
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-64000')
+        conn.execute('PRAGMA mmap_size=268435456')
+        
+        try:
+            if not read_only:
+                conn.execute('PRAGMA analysis_limit=10000')
+                if _OPTIMIZE_ALL_TABLES:
+                    conn.execute('PRAGMA optimize=0x10002')
+            
+            yield conn
+            
+            if not read_only:
+                conn.execute('PRAGMA optimize')
+        finally:
+            conn.close()
+    
     def run_full_maintenance(self) -> Dict:
         """Run complete system maintenance cycle"""
         maintenance_results = {
@@ -228,6 +292,15 @@ class SystemMaintenanceAutomation:
         try:
             db_config = self.config['database_optimization']
             
+            # reindex_enabled is the old name of force_reindex; configs that
+            # still set it keep their REINDEX until they are updated
+            force_reindex = db_config.get('force_reindex')
+            if force_reindex is None and 'reindex_enabled' in db_config:
+                self.logger.warning(
+                    "database_optimization.reindex_enabled is deprecated; use force_reindex instead"
+                )
+                force_reindex = db_config['reindex_enabled']
+            
             # Database paths to optimize
             databases = [
                 {
@@ -254,10 +327,7 @@ class SystemMaintenanceAutomation:
                         'issues_fixed': 0
                     }
                     
-                    # Get initial size
-                    initial_size = os.path.getsize(db_path)
-                    
-                    with sqlite3.connect(db_path, timeout=30) as conn:
+                    with self._open_db(db_path) as conn:
                         # Integrity check
                         if db_config['integrity_check']:
                             cursor = conn.cursor()
@@ -269,30 +339,44 @@ class SystemMaintenanceAutomation:
                             else:
                                 db_result['operations'].append("Integrity check passed")
                         
-                        # VACUUM operation
+                        # VACUUM operation: incremental after a one-time full
+                        # VACUUM that switches the database to incremental
+                        # auto-vacuum, so each run only returns up to
+                        # vacuum_page_limit free pages instead of rewriting
+                        # the whole file
                         if db_config['vacuum_enabled']:
-                            self.logger.info(f"Running VACUUM on {db_path}")
-                            conn.execute('VACUUM')
-                            db_result['operations'].append("VACUUM completed")
+                            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+                            free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                            
+                            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                                self.logger.info(f"Running VACUUM on {db_path} to enable incremental auto-vacuum")
+                                conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                                conn.execute('VACUUM')
+                                db_result['operations'].append("VACUUM completed (incremental auto-vacuum enabled)")
+                            else:
+                                page_limit = db_config.get('vacuum_page_limit', 2000)
+                                self.logger.info(f"Running incremental VACUUM on {db_path}")
+                                # executescript steps the pragma to completion;
+                                # a single execute would free only one page
+                                conn.executescript(f'PRAGMA incremental_vacuum({int(page_limit)});')
+                                db_result['operations'].append("Incremental VACUUM completed")
+                            
+                            pages_freed = free_pages - conn.execute('PRAGMA freelist_count').fetchone()[0]
+                            db_result['space_freed_mb'] = round(max(0, pages_freed) * page_size / (1024 * 1024), 2)
                             db_result['issues_fixed'] += 1
                         
                         # ANALYZE operation
                         if db_config['analyze_enabled']:
-                            self.logger.info(f"Running ANALYZE on {db_path}")
-                            conn.execute('ANALYZE')
-                            db_result['operations'].append("ANALYZE completed")
+                            self.logger.info(f"Updating statistics on {db_path}")
+                            db_result['operations'].append(self._update_statistics(conn))
                         
-                        # REINDEX operation
-                        if db_config['reindex_enabled']:
+                        # REINDEX operation, only on request: indexes do not
+                        # need rebuilding in normal operation
+                        if force_reindex:
                             self.logger.info(f"Running REINDEX on {db_path}")
                             conn.execute('REINDEX')
                             db_result['operations'].append("REINDEX completed")
                     
-                    # Calculate space freed
-                    final_size = os.path.getsize(db_path)
-                    space_freed = max(0, (initial_size - final_size) / (1024 * 1024))
-                    db_result['space_freed_mb'] = round(space_freed, 2)
-                    
                     optimization['databases_processed'].append(db_result)
                     optimization['issues_fixed'] += db_result['issues_fixed']
                     optimization['space_freed_mb'] += db_result['space_freed_mb']
@@ -492,7 +576,7 @@ class SystemMaintenanceAutomation:
             if not os.path.exists(db_path):
                 return {'status': 'error', 'error': 'Database file not found'}
             
-            with sqlite3.connect(db_path, timeout=10) as conn:
+            with self._open_db(db_path, timeout=10, read_only=True) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='table'")
                 table_count = cursor.fetchone()[0]
@@ -688,6 +772,27 @@ class SystemMaintenanceAutomation:
         
         return None
     
+    def _update_statistics(self, conn: sqlite3.Connection) -> str:
+        """Refresh query planner statistics where they are out of date
+        
+        For a connection from _open_db on SQLite 3.46 and later, the
+        PRAGMA optimize=0x10002 run when it opened already re-analyzed every
+        table whose row count changed substantially. Older versions cannot
+        check tables the connection has not queried, and a database that was
+        never analyzed has nothing to compare against, so those get ANALYZE,
+        bounded by the connection's analysis_limit so that large tables are
+        sampled rather than scanned. Returns a description of what was done.
+        """
+        if _OPTIMIZE_ALL_TABLES:
+            has_stats = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'"
+            ).fetchone()[0]
+            if has_stats and conn.execute('SELECT COUNT(*) FROM sqlite_stat1').fetchone()[0]:
+                return "PRAGMA optimize completed"
+        
+        conn.execute('ANALYZE')
+        return "ANALYZE completed"
+    
     def _optimize_database_queries(self) -> Optional[Dict]:
         """Optimize database query performance"""
         try:
@@ -695,9 +800,9 @@ class SystemMaintenanceAutomation:
             if not os.path.exists(db_path):
                 return None
             
-            with sqlite3.connect(db_path) as conn:
+            with self._open_db(db_path) as conn:
                 # Update statistics
-                conn.execute('ANALYZE')
+                self._update_statistics(conn)
                 
                 return {
                     'action': 'database_query_optimization',